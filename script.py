@@ -1,22 +1,39 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import altair as alt
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+from zoneinfo import available_timezones, ZoneInfo
 import random
 import uuid
+import os
+import sys
+import argparse
 import time
+import threading
 import json
+import logging
+import asyncio
+import hashlib
+import sqlite3
 import requests
+import httpx
+import websockets
 import base64
 from io import BytesIO
 import re
 from PIL import Image
 from wordcloud import WordCloud
-from collections import Counter
+from collections import Counter, OrderedDict, deque
 import networkx as nx
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
+from postgrest.utils import SyncClient as PostgrestSession
 
 # Import AgGrid for Airtable-like grid
 from st_aggrid import AgGrid, GridOptionsBuilder, JsCode, GridUpdateMode
@@ -28,6 +45,10 @@ from streamlit_extras.chart_container import chart_container
 from streamlit_lottie import st_lottie
 from streamlit_elements import elements, dashboard, mui, html, lazy, sync
 from contextlib import contextmanager
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
 
 # -----------------------------
 # PAGE CONFIGURATION & STYLING
@@ -408,39 +429,1567 @@ SUPABASE_KEY = (
 "your_supabase_anon_key"
 )
 
+# Connection settings for the shared Supabase client
+SUPABASE_TIMEOUT = 15  # Seconds before a PostgREST request times out
+SUPABASE_KEEPALIVE_EXPIRY = 120  # Seconds an idle pooled connection is kept open
+SUPABASE_MAX_CONNECTIONS = 10
+SUPABASE_MAX_RETRIES = 3  # Retries for requests that fail with a transport error
+SUPABASE_RETRY_BACKOFF = 0.5  # Seconds before the first retry, doubled on each attempt
+
+# Incremental fetch settings
+CHAT_LOGS_TABLE = "chat_logs"
+CHAT_LOGS_TTL = 300  # Seconds before the retained frame is topped up with new rows
+RECONCILE_INTERVAL = 3600  # Seconds between full reloads that pick up late edits and deletes
+CHAT_LOGS_ID_COLUMN = "id"  # Primary key used to de-duplicate at the watermark; None if the table has none
+FETCH_PAGE_SIZE = 1000  # Rows per ranged request; smaller pages are used if PostgREST caps responses lower
+FETCH_CONCURRENCY = 4  # Page requests in flight at once when loading many pages
+DETAILS_BATCH_SIZE = 200  # Ids per request when fetching explorer details, keeping the URL short
+SNAPSHOT_DIR = ".snapshots"  # Arrow IPC snapshots of retained frames, reloaded after a restart
+SNAPSHOT_MAX_SEGMENTS = 32  # Appended snapshot segments before the snapshot is rewritten as one file
+DERIVED_CACHE_SIZE = 32  # Filter sets whose ChatLogStats and rollup cubes are kept per retained frame
+
+# Synthetic datasets for scale tests
+CHAT_LOGS_DATASET = os.environ.get("CHAT_LOGS_DATASET")  # Parquet dataset read instead of Supabase when set
+DATASET_CHUNK_SIZE = 1_000_000  # Rows generated and written at a time
+DATASET_PARTITIONING = ds.partitioning(pa.schema([('date', pa.date32())]), flavor='hive')
+
+# Push update settings
+REALTIME_HEARTBEAT_INTERVAL = 25  # Seconds between heartbeats that keep the Realtime socket open
+CHANGE_FEED_RETENTION = 10000  # Inserted rows kept for stores that have not caught up yet
+LOCAL_FEED_INTERVAL = 5  # Seconds between synthetic inserts published by the local change feed
+# Streamlit (major, minor) releases whose private session API pushed reruns use,
+# from the first inclusive to the second exclusive; others refresh as without a feed
+PUSH_RERUN_STREAMLIT_RANGE = ((1, 18), (2, 0))
+
+# User-topic network layout settings
+NETWORK_LAYOUT_ITERATIONS = 50  # Spring layout iterations for a graph laid out from scratch
+NETWORK_WARM_ITERATIONS = 10  # Iterations for a changed graph starting from the previous positions
+NETWORK_LAYOUT_CACHE_SIZE = 4  # Graphs whose layouts are kept per filter set
+
+# Columns of the chat_logs table, in display order
+CHAT_LOG_COLUMNS = [
+    'conversation_id', 'user_id', 'user_message', 'chatbot_reply', 'response_time', 'timestamp',
+    'sentiment_label', 'sentiment_score', 'drop_off', 'message_length', 'intent', 'tags', 'region',
+    'topic', 'topic_image', 'user_avatar', 'satisfaction', 'resolution_status', 'first_time_user',
+    'response_quality'
+]
+
+# Known chat tags, one bit each of the tags bitmask in this order. Append new
+# tags at the end so existing masks keep their meaning; other tags are dropped
+TAG_VOCABULARY = ['urgent', 'resolved', 'escalated', 'follow-up', 'new-user']
+TAG_BITS = {tag: 1 << bit for bit, tag in enumerate(TAG_VOCABULARY)}
+TAG_MASK_DTYPE = np.min_scalar_type((1 << len(TAG_VOCABULARY)) - 1)
+
+# Compact dtypes applied to chat logs at ingest: low-cardinality strings are
+# categorical, measures are float32, flags are bool and tags are a bitmask.
+# Unlisted columns keep their inferred dtype
+CHAT_LOG_SCHEMA = {
+    'user_id': 'category',
+    'sentiment_label': 'category',
+    'intent': 'category',
+    'region': 'category',
+    'topic': 'category',
+    'topic_image': 'category',
+    'user_avatar': 'category',
+    'resolution_status': 'category',
+    'response_time': 'float32',
+    'sentiment_score': 'float32',
+    'response_quality': 'float32',
+    'message_length': 'Int32',
+    'satisfaction': 'Int8',
+    'drop_off': 'bool',
+    'first_time_user': 'bool',
+    'tags': TAG_MASK_DTYPE,
+}
+
+# Columns each dashboard view reads; only the union for the active views is fetched
+VIEW_COLUMNS = {
+    'filters': ['timestamp', 'user_id', 'sentiment_label', 'topic', 'intent', 'region'],
+    'kpis': ['user_id', 'response_time', 'sentiment_label', 'drop_off'],
+    'overview': ['conversation_id', 'timestamp', 'sentiment_label', 'user_message'],
+    'analysis': ['conversation_id', 'user_id', 'response_time', 'timestamp', 'sentiment_score', 'drop_off', 'message_length'],
+    'visualizations': [
+        'user_id', 'response_time', 'timestamp', 'sentiment_score', 'message_length', 'topic', 'response_quality',
+        'satisfaction'
+    ],
+    'journeys': [
+        'conversation_id', 'user_id', 'user_message', 'chatbot_reply', 'response_time', 'timestamp',
+        'sentiment_label', 'sentiment_score', 'intent', 'topic', 'region', 'resolution_status'
+    ],
+    'explorer': ['timestamp', 'sentiment_label', 'topic', 'tags'],
+    # Shown only in the Chat Explorer grid, and fetched once it asks for them
+    'explorer_details': ['topic_image', 'user_avatar', 'first_time_user'],
+}
+ACTIVE_VIEWS = [view for view in VIEW_COLUMNS if view != 'explorer_details']
+
+# Sidebar filters. The time period is pushed down to Supabase as a PostgREST
+# predicate and the selections are answered from the filter index; aggregate
+# mode pushes both down to Postgres
+TIME_PERIODS = {"Last 24 Hours": 1, "Last 7 Days": 7, "Last 30 Days": 30, "All Time": None}
+FILTER_COLUMNS = ['user_id', 'sentiment_label', 'topic', 'intent', 'region']
+
+# Text columns covered by the Chat Explorer search index, and the rows it
+# indexes at a time
+SEARCH_COLUMNS = ['user_message', 'chatbot_reply']
+SEARCH_INDEX_BATCH_ROWS = 20_000
+
+# User journey stages: the columns a journey can pass through and their display names
+JOURNEY_STAGES = {
+    'user_id': 'User', 'topic': 'Topic', 'intent': 'Intent', 'sentiment_label': 'Sentiment',
+    'region': 'Region', 'resolution_status': 'Resolution'
+}
+JOURNEY_DEFAULT_STAGES = ['user_id', 'intent', 'sentiment_label']
+JOURNEY_TOP_N = 10  # Values shown per stage; the rest are folded into JOURNEY_OTHER
+JOURNEY_OTHER = "Other"
+
+# User comparison radar axes: the user metrics column behind each and whether higher values are better
+RADAR_METRICS = {
+    'Response Speed': ('Avg Response Time', False),
+    'Sentiment': ('Avg Sentiment', True),
+    'Message Length': ('Avg Message Length', True),
+    'Retention': ('Drop-off %', False),
+    'Volume': ('Message Count', True),
+}
+RADAR_TOP_N = 8  # Users compared on the radar by default, busiest first
+
+# Timezones offered for reading activity by local hour
+DISPLAY_TIMEZONES = sorted(available_timezones())
+
+# Word cloud terms: words of the user messages, minus punctuation, stop words
+# and words of two letters or fewer
+WORD_CLOUD_COLUMN = 'user_message'
+WORD_CLOUD_MAX_WORDS = 100
+WORD_CLOUD_CACHE_SIZE = 32  # Rendered word cloud images kept, least recently used evicted first
+WORD_CLOUD_PRECISION = 100  # Steps of the top frequency a word's count is rounded to in a fingerprint
+WORD_CLOUD_STOP_WORDS = frozenset([
+    'the', 'and', 'to', 'of', 'a', 'in', 'for', 'is', 'on', 'that', 'by', 'this', 'with', 'i', 'you', 'it',
+    'not', 'or', 'be', 'are', 'from', 'at', 'as', 'your', 'have', 'topic', 'lorem', 'ipsum'
+])
+
+# Rollup cube kept per retained frame: cells are an hour plus one value of each
+# dimension, holding the message count and the count, sum and sum of squares
+# of each measure. Dimensions are kept to low-cardinality columns
+CUBE_DIMENSIONS = ['topic', 'sentiment_label', 'region', 'intent']
+CUBE_MEASURES = ['sentiment_score', 'response_time']
+CORRELATION_MEASURES = ['sentiment_score', 'response_time', 'message_length', 'response_quality', 'satisfaction']
+MEASURE_TOTALS = ['count'] + [f'{stat}_{col}' for col in CUBE_MEASURES for stat in ('n', 'sum', 'sumsq')]
+
+# Time series rollups, finest first: numpy unit, units per bucket, and the
+# offset that aligns weeks to Mondays. Charts use the finest resolution that
+# shows the time period in at most TIMELINE_MAX_POINTS buckets
+TIME_RESOLUTIONS = {
+    'minute': ('m', 1, 0),
+    'hour': ('h', 1, 0),
+    'day': ('D', 1, 0),
+    'week': ('D', 7, 3),
+}
+TIMELINE_MAX_POINTS = 200
+
+# Postgres functions backing aggregate mode. Run once in the Supabase SQL editor;
+# the SQLite stand-in below mirrors them for offline use.
+CHAT_LOG_AGGREGATE_FUNCTIONS_SQL = """
+create or replace function chat_log_filtered(
+    since timestamptz, user_id_in text[], sentiment_label_in text[],
+    topic_in text[], intent_in text[], region_in text[]
+) returns setof chat_logs language sql stable as $$
+    select * from chat_logs
+    where (since is null or timestamp >= since)
+      and (user_id_in is null or user_id = any(user_id_in))
+      and (sentiment_label_in is null or sentiment_label = any(sentiment_label_in))
+      and (topic_in is null or topic = any(topic_in))
+      and (intent_in is null or intent = any(intent_in))
+      and (region_in is null or region = any(region_in))
+$$;
+
+create or replace function chat_log_kpis(
+    since timestamptz default null, user_id_in text[] default null, sentiment_label_in text[] default null,
+    topic_in text[] default null, intent_in text[] default null, region_in text[] default null
+) returns table (
+    total_messages bigint, unique_users bigint, avg_response_time double precision,
+    positive_ratio double precision, drop_off_rate double precision
+) language sql stable as $$
+    select count(*), count(distinct user_id), avg(response_time),
+           avg((sentiment_label = 'positive')::int), avg(drop_off::int)
+    from chat_log_filtered(since, user_id_in, sentiment_label_in, topic_in, intent_in, region_in)
+$$;
+
+create or replace function chat_log_daily_counts(
+    since timestamptz default null, user_id_in text[] default null, sentiment_label_in text[] default null,
+    topic_in text[] default null, intent_in text[] default null, region_in text[] default null
+) returns table (day date, message_count bigint) language sql stable as $$
+    select timestamp::date, count(*)
+    from chat_log_filtered(since, user_id_in, sentiment_label_in, topic_in, intent_in, region_in)
+    group by 1 order by 1
+$$;
+
+create or replace function chat_log_filter_options(
+    since timestamptz default null
+) returns table (filter_column text, value text) language sql stable as $$
+    select distinct f.filter_column, f.value
+    from chat_log_filtered(since, null, null, null, null, null) c
+    cross join lateral (values
+        ('user_id', c.user_id::text), ('sentiment_label', c.sentiment_label),
+        ('topic', c.topic), ('intent', c.intent), ('region', c.region)
+    ) as f(filter_column, value)
+    where f.value is not null
+$$;
+"""
+
 # -----------------------------
 # DATA FUNCTIONS
 # -----------------------------
-@st.cache_data(ttl=300)
-def fetch_chat_logs() -> pd.DataFrame:
+@st.cache_resource
+def get_supabase_client() -> Client:
+    """
+    Process-wide Supabase client shared by every session and fetch.
+    PostgREST requests go through one pooled HTTP session whose connections
+    are kept alive between reruns, so fetches reuse warm connections.
+    """
+    supabase: Client = create_client(
+        SUPABASE_URL,
+        SUPABASE_KEY,
+        options=ClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT)
+    )
+    default_session = supabase.postgrest.session
+    supabase.postgrest.session = PostgrestSession(
+        base_url=default_session.base_url,
+        headers=default_session.headers,
+        timeout=default_session.timeout,
+        limits=httpx.Limits(
+            max_connections=SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_MAX_CONNECTIONS,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY
+        )
+    )
+    default_session.close()
+    return supabase
+
+def execute_with_retry(query):
+    """Execute a PostgREST query, retrying transport failures with exponential backoff"""
+    for attempt in range(SUPABASE_MAX_RETRIES + 1):
+        try:
+            return query.execute()
+        except httpx.TransportError:
+            if attempt == SUPABASE_MAX_RETRIES:
+                raise
+            delay = SUPABASE_RETRY_BACKOFF * 2 ** attempt
+            time.sleep(delay + random.uniform(0, delay / 2))
+
+class ChatLogStore:
+    """
+    Process-wide chat log frame that is topped up incrementally.
+    Keeps the last-seen timestamp (and the ids seen at that timestamp) as a
+    watermark so a refresh only fetches newer rows, and periodically reloads
+    the whole table in the background to pick up late edits and deletes.
+    The frame and watermark are snapshotted to disk so a restarted process
+    resumes with a delta fetch. With push updates on, rows inserted since
+    the last fetch are taken from the change feed instead.
+    """
+    def __init__(self, snapshot_path=None):
+        self.df = pd.DataFrame()
+        self.watermark = None
+        self.watermark_ids = set()
+        self.feed_seq = 0
+        self.fetched_at = None
+        self.reconciled_at = None
+        self.reconciling = False
+        self.version = 0
+        self.saved_version = 0
+        # Rows appended since the last snapshot write, or None if the whole frame is unsaved
+        self.unsaved = None
+        self.snapshot_base = None
+        self.snapshot_segments = 0
+        self.index = None
+        self.structures = {}
+        self.derived = {}
+        self.snapshot_path = snapshot_path
+        self.lock = threading.Lock()
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load_snapshot()
+
+    def is_fresh(self, now):
+        return self.fetched_at is not None and (now - self.fetched_at).total_seconds() < CHAT_LOGS_TTL
+
+    def needs_reconcile(self, now):
+        return self.reconciled_at is None or (now - self.reconciled_at).total_seconds() >= RECONCILE_INTERVAL
+
+    def trim(self, cutoff):
+        """Drop retained rows that have fallen out of the filter's time window"""
+        if cutoff is None or self.df.empty:
+            return
+        cutoff = _comparable_cutoff(self.df['timestamp'], cutoff)
+        if self.df['timestamp'].min() < cutoff:
+            keep = self.df['timestamp'] >= cutoff
+            dropped = self.df[~keep]
+            for name, structure in list(self.structures.items()):
+                if hasattr(structure, 'remove'):
+                    structure.remove(dropped)
+                else:
+                    # Rebuilt from the remaining rows on next use
+                    del self.structures[name]
+            self.df = self.df[keep].reset_index(drop=True)
+            self.version += 1
+
+    def replace(self, df, now, structures=None):
+        """
+        Swap in a full reload of the table, with the structures already built
+        over it if given; others are built on first use
+        """
+        # Structures address rows by position, so the frame is kept on a plain range index
+        if not df.index.equals(pd.RangeIndex(len(df))):
+            df = df.reset_index(drop=True)
+        self.df = df
+        self.reconciled_at = now
+        self.watermark = None
+        self.watermark_ids = set()
+        self._advance_watermark(df)
+        self.structures = structures if structures is not None else {}
+        self.unsaved = None
+        self.version += 1
+
+    def append(self, new_rows):
+        """Append rows fetched past the watermark, skipping ones already retained"""
+        if new_rows.empty:
+            return
+        if CHAT_LOGS_ID_COLUMN in new_rows.columns and self.watermark is not None:
+            seen = (new_rows['timestamp'] == self.watermark) & new_rows[CHAT_LOGS_ID_COLUMN].isin(self.watermark_ids)
+            new_rows = new_rows[~seen]
+            if new_rows.empty:
+                return
+        start = len(self.df)
+        self.df = concat_chat_logs([self.df, new_rows])
+        self._advance_watermark(new_rows)
+        # Appended rows keep their positions in the frame as labels
+        added = self.df.iloc[start:]
+        for structure in self.structures.values():
+            structure.add(added)
+        if self.unsaved is not None:
+            self.unsaved.append(added)
+        self.version += 1
+
+    def read(self, method, *args):
+        """Call method(self, *args) holding the lock, so a refresh cannot swap the rows mid-read"""
+        with self.lock:
+            return method(self, *args)
+
+    def structure(self, name):
+        """The named STORE_STRUCTURES entry over the retained rows, built on first use"""
+        if name not in self.structures:
+            self.structures[name] = STORE_STRUCTURES[name](self.df)
+        return self.structures[name]
+
+    def filter_index(self) -> 'FilterIndex':
+        """Filter index over the retained frame, rebuilt once per data version"""
+        if self.index is None or self.index.version != self.version:
+            self.index = FilterIndex(self.df, self.version)
+        return self.index
+
+    def select(self, dimensions) -> pd.DataFrame:
+        """Retained rows matching a filter set's dimension selections"""
+        if not dimensions:
+            return self.df
+        return self.df.take(self.filter_index().rows(dimensions))
+
+    def filter_options(self) -> dict:
+        """Sorted values of each filter column among the retained rows"""
+        return self.filter_index().options()
+
+    def search(self, dimensions, query, literal=False) -> np.ndarray:
+        """Positions of the rows matching the dimension selections whose messages match a search query"""
+        rows = self.structure('search').search(self.df, query, literal)
+        if dimensions:
+            rows = np.intersect1d(rows, self.filter_index().rows(dimensions), assume_unique=True)
+        return rows
+
+    def stats(self, dimensions) -> 'ChatLogStats':
+        """ChatLogStats of the rows matching a filter set's dimension selections"""
+        return self._derived('stats', dimensions, compute_chat_log_stats)
+
+    def rollup(self, dimensions, by) -> pd.DataFrame:
+        """Rollup cube totals, grouped by `by`, of the rows matching the dimension selections"""
+        cube, selections = self._cube_for(dimensions)
+        return cube.query(by, selections)
+
+    def time_series(self, dimensions, days=None) -> tuple:
+        """
+        Resolution and TimeRollups.series of the rows matching the dimension
+        selections, at the finest resolution that fits `days`
+        """
+        timeline = self._structure_for('timeline', dimensions)
+        resolution = timeline.resolution_for(days)
+        return resolution, timeline.series(resolution)
+
+    def activity(self, dimensions) -> pd.DataFrame:
+        """TimeRollups.activity of the rows matching the dimension selections"""
+        return self._structure_for('timeline', dimensions).activity()
+
+    def correlation(self, dimensions) -> pd.DataFrame:
+        """Correlation of CORRELATION_MEASURES over the rows matching the dimension selections"""
+        return self._structure_for('moments', dimensions).correlation()
+
+    def top_terms(self, dimensions, k) -> dict:
+        """Most frequent message words of the rows matching the dimension selections"""
+        return self._structure_for('terms', dimensions).top(k)
+
+    def _cube_for(self, dimensions) -> tuple:
+        """
+        Rollup cube answering the dimension selections, and the selections
+        left for it to apply. Selections outside the cube's dimensions get a
+        cube over just their rows.
+        """
+        if all(col in CUBE_DIMENSIONS for col, _ in dimensions):
+            return self.structure('cube'), dimensions
+        return self._structure_for('cube', dimensions), ()
+
+    def _structure_for(self, name, dimensions):
+        """
+        The named structure over the rows matching the dimension selections:
+        the one kept in step for all retained rows, or one built over the
+        selected rows once per data version
+        """
+        if not dimensions:
+            return self.structure(name)
+        return self._derived(name, dimensions, STORE_STRUCTURES[name])
+
+    def _derived(self, kind, dimensions, compute):
+        """Result of compute over the selected rows, computed once per data version"""
+        key = (kind, self.version, dimensions)
+        if key not in self.derived:
+            # Entries for older versions can never be hit again
+            self.derived = {k: v for k, v in self.derived.items() if k[1] == self.version}
+            if len(self.derived) >= DERIVED_CACHE_SIZE:
+                self.derived.pop(next(iter(self.derived)))
+            self.derived[key] = compute(self.select(dimensions))
+        return self.derived[key]
+
+    def apply_feed(self, feed, columns, filters) -> bool:
+        """
+        Append rows pushed to the change feed since this store last caught up.
+        Returns False if the feed has already dropped some of them, in which
+        case the store has to fetch from its watermark instead.
+        """
+        pending = feed.since(self.feed_seq)
+        if pending is None:
+            return False
+        records, self.feed_seq = pending
+        if records:
+            rows = apply_filters(_page_to_frame(records), filters)
+            rows = rows[[col for col in columns if col in rows.columns]]
+            # Rows published while a fetch was running may already be retained
+            if CHAT_LOGS_ID_COLUMN in rows.columns and CHAT_LOGS_ID_COLUMN in self.df.columns:
+                rows = rows[~rows[CHAT_LOGS_ID_COLUMN].isin(self.df[CHAT_LOGS_ID_COLUMN])]
+            self.append(rows)
+        return True
+
+    def load_snapshot(self):
+        """
+        Restore the frame and watermark from the on-disk snapshot and its
+        appended segments. Files are memory-mapped, and columns Arrow can hand
+        over as they are stay backed by the map instead of being copied.
+        """
+        try:
+            frames = []
+            for path in [self.snapshot_path, *self._snapshot_segment_paths()]:
+                with pa.memory_map(path, 'r') as source:
+                    table = pa.ipc.open_file(source).read_all()
+                file_meta = json.loads(table.schema.metadata[b'chat_log_store'])
+                if frames and file_meta.get('base') != meta.get('base'):
+                    # Left behind by a rewrite that could not remove them
+                    break
+                meta = file_meta
+                frames.append(table.to_pandas(split_blocks=True))
+            saved_tags = meta.get('tag_vocabulary', [])
+            if TAG_VOCABULARY[:len(saved_tags)] != saved_tags:
+                # Tag bits were reassigned, so the saved masks no longer decode
+                return
+            # Snapshots written before a schema change are cast on load
+            self.df = apply_chat_log_schema(frames[0] if len(frames) == 1 else concat_chat_logs(frames))
+        except Exception:
+            # An unreadable snapshot just means a cold start
+            return
+        self.structures = {}
+        self.unsaved = []
+        self.snapshot_base = meta.get('base')
+        self.snapshot_segments = len(frames) - 1
+        if meta['watermark'] is not None:
+            self.watermark = pd.Timestamp(meta['watermark'])
+        self.watermark_ids = set(meta['watermark_ids'])
+        if meta['reconciled_at'] is not None:
+            self.reconciled_at = datetime.fromisoformat(meta['reconciled_at'])
+
+    def save_snapshot(self):
+        """
+        Write the frame and watermark to disk if they changed since the last
+        write. Rows appended since then go to a new segment file next to the
+        snapshot; after a full reload, or once there are SNAPSHOT_MAX_SEGMENTS
+        segments, the whole frame is rewritten instead. Rows dropped by trims
+        stay on disk until then and are trimmed again on load.
+        """
+        if not self.snapshot_path or self.version == self.saved_version:
+            return
+        os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+        if self.unsaved is None or self.snapshot_segments >= SNAPSHOT_MAX_SEGMENTS:
+            self.snapshot_base = uuid.uuid4().hex
+            self._write_snapshot_file(self.snapshot_path, self.df)
+            for path in self._snapshot_segment_paths():
+                os.remove(path)
+            self.snapshot_segments = 0
+        elif self.unsaved:
+            self.snapshot_segments += 1
+            self._write_snapshot_file(
+                f"{self.snapshot_path}.{self.snapshot_segments}", concat_chat_logs(self.unsaved)
+            )
+        self.unsaved = []
+        self.saved_version = self.version
+
+    def _snapshot_segment_paths(self) -> list:
+        paths = []
+        while os.path.exists(f"{self.snapshot_path}.{len(paths) + 1}"):
+            paths.append(f"{self.snapshot_path}.{len(paths) + 1}")
+        return paths
+
+    def _write_snapshot_file(self, path, df):
+        """Write rows with the current watermark, tagged with the snapshot they belong to"""
+        meta = {
+            'base': self.snapshot_base,
+            'watermark': self.watermark.isoformat() if self.watermark is not None else None,
+            'watermark_ids': [v.item() if hasattr(v, 'item') else v for v in self.watermark_ids],
+            'reconciled_at': self.reconciled_at.isoformat() if self.reconciled_at else None,
+            'tag_vocabulary': TAG_VOCABULARY,
+        }
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}), b'chat_log_store': json.dumps(meta).encode()
+        })
+        # Write to a temporary file first so readers never see a partial snapshot
+        tmp_path = f"{path}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def _advance_watermark(self, rows):
+        if rows.empty or 'timestamp' not in rows.columns:
+            return
+        latest = rows['timestamp'].max()
+        if CHAT_LOGS_ID_COLUMN in rows.columns:
+            latest_ids = set(rows.loc[rows['timestamp'] == latest, CHAT_LOGS_ID_COLUMN])
+        else:
+            latest_ids = set()
+        if self.watermark is None or latest > self.watermark:
+            self.watermark = latest
+            self.watermark_ids = latest_ids
+        elif latest == self.watermark:
+            self.watermark_ids |= latest_ids
+
+class FilterIndex:
     """
-    Fetch chat logs from Supabase.
-    Returns a DataFrame. If no data is available, an empty DataFrame is returned.
+    Inverted index over the sidebar filter columns of a chat log frame.
+    Each value maps to the sorted positions of the rows holding it, so a
+    filter combination is answered by merging and intersecting those arrays
+    instead of masking the whole frame once per filter.
     """
+    def __init__(self, df: pd.DataFrame, version=None):
+        self.version = version
+        self.postings = {}
+        for col in FILTER_COLUMNS:
+            if col not in df.columns:
+                continue
+            values = df[col].astype('category')
+            codes = values.cat.codes.to_numpy()
+            # A stable sort by code groups each value's rows in position order
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(values.cat.categories) + 1))
+            self.postings[col] = {
+                value: order[bounds[i]:bounds[i + 1]]
+                for i, value in enumerate(values.cat.categories)
+                if bounds[i + 1] > bounds[i]
+            }
+
+    def options(self) -> dict:
+        """Sorted values present in each filter column"""
+        return {col: sorted(self.postings.get(col, {})) for col in FILTER_COLUMNS}
+
+    def rows(self, dimensions) -> np.ndarray:
+        """Sorted positions of the rows matching every (column, values) selection"""
+        matches = []
+        for col, values in dimensions:
+            postings = self.postings.get(col, {})
+            # Values of one column never share rows, so their union is a plain merge
+            hits = [postings[value] for value in values if value in postings]
+            matches.append(np.sort(np.concatenate(hits)) if hits else np.empty(0, dtype=np.intp))
+        # Intersect the most selective dimensions first
+        matches.sort(key=len)
+        result = matches[0]
+        for rows in matches[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, rows, assume_unique=True)
+        return result
+
+class MessageSearchIndex:
+    """
+    Trigram index over the SEARCH_COLUMNS of a chat log frame, kept in step
+    with the frame as rows are appended and trimmed. A query term is looked
+    up by intersecting the postings of its trigrams, and only those candidate
+    rows are checked for the actual text, so nothing is matched as a regex.
+    Rows are indexed under their labels, which are their positions in the
+    frame, plus an offset that grows as rows are trimmed from the front.
+    Postings are keyed by packed trigram codes and hold int32 positions.
+    """
+    def __init__(self, df: pd.DataFrame = None):
+        self.postings = {}
+        self.offset = 0
+        if df is not None:
+            self.add(df)
+
+    def add(self, rows: pd.DataFrame):
+        """Index rows appended to the frame"""
+        # Batches bound the memory taken by the (trigram, row) pairs
+        for start in range(0, len(rows), SEARCH_INDEX_BATCH_ROWS):
+            self._add(rows.iloc[start:start + SEARCH_INDEX_BATCH_ROWS])
+
+    def _add(self, rows: pd.DataFrame):
+        # Chat logs repeat a lot of text, so each distinct text is split once
+        columns = []
+        texts = []
+        for col in SEARCH_COLUMNS:
+            if col in rows.columns:
+                # Missing texts get a code too, and split into no trigrams
+                codes, uniques = pd.factorize(rows[col], use_na_sentinel=False)
+                columns.append(codes + len(texts))
+                texts.extend(text.lower() if isinstance(text, str) else '' for text in uniques)
+        if not texts:
+            return
+        codes, owners = _trigram_codes(texts)
+        # Trigrams get dense ids so each (trigram, row) pair packs into one int64
+        trigrams, ids = np.unique(codes, return_inverse=True)
+        starts = np.searchsorted(owners, np.arange(len(texts) + 1))
+        pairs = []
+        for text_ids in columns:
+            lengths = starts[text_ids + 1] - starts[text_ids]
+            # Each row's run of its text's trigrams, gathered without a Python loop
+            gather = np.arange(lengths.sum()) + np.repeat(starts[text_ids] - (np.cumsum(lengths) - lengths), lengths)
+            pairs.append(ids[gather].astype(np.int64) * len(rows) + np.repeat(np.arange(len(rows)), lengths))
+        # Sorting the packed pairs groups them by trigram, with rows in order
+        pairs = np.unique(np.concatenate(pairs))
+        if not len(pairs):
+            return
+        ids, positions = np.divmod(pairs, len(rows))
+        positions = (rows.index.to_numpy(dtype=np.int64)[positions] + self.offset).astype(np.int32)
+        bounds = np.flatnonzero(np.diff(ids)) + 1
+        for trigram, chunk in zip(trigrams[ids[np.r_[0, bounds]]].tolist(), np.split(positions, bounds)):
+            self.postings.setdefault(trigram, []).append(chunk)
+
+    def remove(self, rows: pd.DataFrame):
+        """Unindex rows that are being dropped from the frame"""
+        dropped = np.sort(rows.index.to_numpy(dtype=np.intp))
+        if not len(dropped):
+            return
+        if dropped[-1] == len(dropped) - 1:
+            # Rows dropped from the front only shift the offset; their
+            # postings are skipped on lookup and compacted away then
+            self.offset += len(dropped)
+            return
+        dropped += self.offset
+        for trigram, chunks in list(self.postings.items()):
+            positions = np.concatenate(chunks)
+            positions = positions[positions >= self.offset]
+            positions = positions[~np.isin(positions, dropped, assume_unique=True)]
+            if len(positions):
+                # Later rows move up by the number dropped before them
+                chunks[:] = [(positions - np.searchsorted(dropped, positions)).astype(np.int32)]
+            else:
+                del self.postings[trigram]
+
+    def search(self, df: pd.DataFrame, query, literal=False) -> np.ndarray:
+        """
+        Sorted positions of rows matching the query in any search column.
+        Every whitespace-separated term must appear; a term ending in * only
+        matches at the start of a word. With `literal` the query is matched
+        as one exact substring.
+        """
+        query = query.lower()
+        terms = [query] if literal else query.split()
+        rows = None
+        for term in terms:
+            prefix = not literal and term.endswith('*') and len(term) > 1
+            term = term.rstrip('*') if prefix else term
+            candidates = self._candidates(term)
+            if rows is not None:
+                candidates = rows if candidates is None else np.intersect1d(rows, candidates, assume_unique=True)
+            elif candidates is None:
+                # Terms too short for a trigram are checked against every row
+                candidates = np.arange(len(df))
+            rows = self._verify(df, candidates, term, prefix)
+            if not len(rows):
+                break
+        return rows if rows is not None else np.arange(len(df))
+
+    def _candidates(self, term):
+        trigrams = np.unique(_trigram_codes([term])[0]).tolist()
+        if not trigrams:
+            return None
+        postings = sorted((self._postings(trigram) for trigram in trigrams), key=len)
+        rows = postings[0]
+        for other in postings[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def _postings(self, trigram) -> np.ndarray:
+        """Sorted rows containing a trigram, merging the chunks added by updates"""
+        chunks = self.postings.get(trigram)
+        if not chunks:
+            return np.empty(0, dtype=np.int32)
+        positions = np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+        # Postings of rows trimmed from the front sort first
+        positions = positions[np.searchsorted(positions, self.offset):]
+        chunks[:] = [positions]
+        return positions - self.offset
+
+    def _verify(self, df, candidates, term, prefix):
+        """Candidates whose text in any search column contains the term"""
+        found = np.zeros(len(candidates), dtype=bool)
+        for col in SEARCH_COLUMNS:
+            if col not in df.columns:
+                continue
+            unchecked = np.flatnonzero(~found)
+            texts = pd.Series(df[col].to_numpy()[candidates[unchecked]], dtype=object).str.lower()
+            if prefix:
+                matched = texts.str.contains(r'\b' + re.escape(term), regex=True, na=False)
+            else:
+                matched = texts.str.contains(term, regex=False, na=False)
+            found[unchecked[matched.to_numpy(dtype=bool)]] = True
+        return candidates[found]
+
+def _trigram_codes(texts) -> tuple:
+    """
+    Trigrams of each text as int64 codes, three code points of 21 bits
+    apiece, and the index of the text each one came from
+    """
+    # Texts are split in one pass over their joined code points; NUL
+    # separators keep trigrams from spanning two texts
+    points = np.frombuffer('\0'.join(texts).encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+    owners = np.cumsum(points == 0)[:-2]
+    codes = (points[:-2] << 42) | (points[1:-1] << 21) | points[2:]
+    within = (points[:-2] != 0) & (points[1:-1] != 0) & (points[2:] != 0)
+    return codes[within], owners[within]
+
+class TermFrequencies:
+    """
+    Word counts over the WORD_CLOUD_COLUMN of a chat log frame, kept in step
+    with a frame that grows by appending and sheds rows as they age out of
+    the time window. Each distinct message in a batch is split once.
+    """
+    def __init__(self, df: pd.DataFrame = None):
+        self.counts = Counter()
+        if df is not None:
+            self.add(df)
+
+    def add(self, rows: pd.DataFrame):
+        """Count the words of rows appended to the frame"""
+        self._count(rows, 1)
+
+    def remove(self, rows: pd.DataFrame):
+        """Uncount the words of counted rows that are being dropped from the frame"""
+        self._count(rows, -1)
+        # Unary plus drops the words no longer used
+        self.counts = +self.counts
+
+    def top(self, k) -> dict:
+        """The k most frequent words and their counts"""
+        return dict(self.counts.most_common(k))
+
+    def _count(self, rows: pd.DataFrame, sign):
+        if WORD_CLOUD_COLUMN not in rows.columns:
+            return
+        for text, n in rows[WORD_CLOUD_COLUMN].value_counts().items():
+            if isinstance(text, str):
+                for word in _terms(text):
+                    self.counts[word] += sign * n
+
+def _terms(text) -> list:
+    words = _NON_WORD.sub('', text.lower()).split()
+    return [word for word in words if word not in WORD_CLOUD_STOP_WORDS and len(word) > 2]
+
+_NON_WORD = re.compile(r'[^\w\s]')
+
+def _measure_totals(rows: pd.DataFrame) -> dict:
+    """Per-row MEASURE_TOTALS columns, ready to be summed over any grouping"""
+    totals = {'count': np.ones(len(rows), dtype=np.int64)}
+    for col in CUBE_MEASURES:
+        values = rows[col].to_numpy(dtype=np.float64, na_value=np.nan) if col in rows.columns else np.full(len(rows), np.nan)
+        present = ~np.isnan(values)
+        values = np.where(present, values, 0.0)
+        totals[f'n_{col}'] = present.astype(np.int64)
+        totals[f'sum_{col}'] = values
+        totals[f'sumsq_{col}'] = values * values
+    return totals
+
+class CovarianceAccumulator:
+    """
+    Pairwise counts, means, sums of squared deviations and co-moments of
+    CORRELATION_MEASURES, kept in step with a chat log frame as rows are
+    appended and trimmed. Each batch of rows is summarized on its own and
+    merged in with Chan's parallel form of Welford's update, so accumulators
+    over separate chunks or partitions merge the same way; trimmed batches
+    are taken back out by running the update in reverse. Missing values are
+    skipped pairwise, as pandas does. Entry [i, j] of each matrix covers the
+    rows where measures i and j are both present.
+    """
+    def __init__(self, df: pd.DataFrame = None):
+        k = len(CORRELATION_MEASURES)
+        self.n = np.zeros((k, k))
+        self.mean = np.zeros((k, k))  # Mean of measure i
+        self.m2 = np.zeros((k, k))  # Squared deviations of measure i from that mean
+        self.comoment = np.zeros((k, k))
+        if df is not None:
+            self.add(df)
+
+    def add(self, rows: pd.DataFrame):
+        """Merge in rows appended to the frame"""
+        if not rows.empty:
+            self.merge(self._summarize(rows))
+
+    def merge(self, other: 'CovarianceAccumulator'):
+        """Fold another accumulator's rows into this one"""
+        n = self.n + other.n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(n > 0, self.n * other.n / n, 0.0)
+            share = np.where(n > 0, other.n / n, 0.0)
+        delta = other.mean - self.mean
+        self.comoment = self.comoment + other.comoment + delta * delta.T * weight
+        self.m2 = self.m2 + other.m2 + delta ** 2 * weight
+        self.mean = self.mean + delta * share
+        self.n = n
+
+    def remove(self, rows: pd.DataFrame):
+        """Take merged rows that are being dropped from the frame back out"""
+        if not rows.empty:
+            self.unmerge(self._summarize(rows))
+
+    def unmerge(self, other: 'CovarianceAccumulator'):
+        """Take rows folded in from another accumulator back out of this one"""
+        n = self.n - other.n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(n > 0, (self.n * self.mean - other.n * other.mean) / n, 0.0)
+            weight = np.where(n > 0, n * other.n / self.n, 0.0)
+        delta = other.mean - mean
+        # Pairs left without rows start over from zero rather than from rounding error
+        empty = n <= 0
+        self.comoment = np.where(empty, 0.0, self.comoment - other.comoment - delta * delta.T * weight)
+        self.m2 = np.where(empty, 0.0, self.m2 - other.m2 - delta ** 2 * weight)
+        self.mean = mean
+        self.n = np.maximum(n, 0.0)
+
+    @classmethod
+    def _summarize(cls, rows: pd.DataFrame) -> 'CovarianceAccumulator':
+        """Moments of one batch of rows, from matrix products over its column arrays"""
+        X = np.column_stack([
+            rows[col].to_numpy(dtype=np.float64, na_value=np.nan) if col in rows.columns else np.full(len(rows), np.nan)
+            for col in CORRELATION_MEASURES
+        ])
+        present = ~np.isnan(X)
+        P = present.astype(np.float64)
+        # Centre on the batch means first so the differences of large sums keep their precision
+        with np.errstate(divide='ignore', invalid='ignore'):
+            centre = np.where(present.any(axis=0), np.nansum(X, axis=0) / present.sum(axis=0), 0.0)
+        centred = np.where(present, X - centre, 0.0)
+        batch = cls()
+        batch.n = P.T @ P
+        pair_sum = centred.T @ P
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pair_mean = np.where(batch.n > 0, pair_sum / batch.n, 0.0)
+        batch.m2 = (centred * centred).T @ P - pair_sum * pair_mean
+        batch.comoment = centred.T @ centred - pair_sum * pair_mean.T
+        batch.mean = np.where(batch.n > 0, pair_mean + centre[:, None], 0.0)
+        return batch
+
+    def covariance(self) -> pd.DataFrame:
+        """Sample covariance of each pair of measures"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = np.where(self.n > 1, self.comoment / (self.n - 1), np.nan)
+        return pd.DataFrame(covariance, index=CORRELATION_MEASURES, columns=CORRELATION_MEASURES)
+
+    def correlation(self) -> pd.DataFrame:
+        """Pearson correlation of each pair of measures"""
+        m2 = np.maximum(self.m2, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = np.where(self.n > 1, self.comoment / np.sqrt(m2 * m2.T), np.nan)
+        return pd.DataFrame(correlation, index=CORRELATION_MEASURES, columns=CORRELATION_MEASURES)
+
+class KeyedTotals:
+    """
+    MEASURE_TOTALS per key, a tuple of integer codes. Totals are kept in
+    arrays indexed by slot, so folding in a batch of rows only touches the
+    slots of the keys the batch holds. Keys whose count drops to zero keep
+    their slot until they make up half the table, then the table is compacted.
+    """
+    def __init__(self, names):
+        self.names = names  # What each code of a key stands for
+        self.slots = {}
+        self.keys = np.empty((0, len(names)), dtype=np.int64)
+        self.totals = np.empty((0, len(MEASURE_TOTALS)))
+        self.size = 0
+
+    def fold(self, codes, totals: pd.DataFrame, sign):
+        """Add (sign 1) or subtract (sign -1) per-row totals under the keys given by one code array per name"""
+        if totals.empty:
+            return
+        batch = totals.groupby(codes, sort=False).sum()
+        labels = batch.index.tolist()
+        slots = np.fromiter((self.slots.get(label, -1) for label in labels), dtype=np.intp, count=len(labels))
+        new = np.flatnonzero(slots < 0)
+        if len(new):
+            slots[new] = self._allocate([labels[i] for i in new])
+        self.totals[slots] += sign * batch.to_numpy(dtype=np.float64)
+        if sign < 0 and np.count_nonzero(self.totals[:self.size, 0] == 0) * 2 > self.size:
+            self._compact()
+
+    def live(self) -> tuple:
+        """Keys and totals of the slots holding rows"""
+        live = self.totals[:self.size, 0] != 0
+        return self.keys[:self.size][live], self.totals[:self.size][live]
+
+    def _allocate(self, labels) -> np.ndarray:
+        start, end = self.size, self.size + len(labels)
+        if end > len(self.totals):
+            # Capacity doubles, so appends stay amortized O(batch)
+            capacity = max(end, 2 * len(self.totals), 64)
+            self.keys = np.concatenate([self.keys[:start], np.zeros((capacity - start, len(self.names)), dtype=np.int64)])
+            self.totals = np.concatenate([self.totals[:start], np.zeros((capacity - start, len(MEASURE_TOTALS)))])
+        self.keys[start:end] = np.asarray(labels, dtype=np.int64).reshape(len(labels), len(self.names))
+        self.slots.update(zip(labels, range(start, end)))
+        self.size = end
+        return np.arange(start, end)
+
+    def _compact(self):
+        keys, totals = self.live()
+        labels = [tuple(key) if len(self.names) > 1 else key[0] for key in keys.tolist()]
+        self.slots = dict(zip(labels, range(len(labels))))
+        self.keys, self.totals, self.size = keys, totals, len(labels)
+
+def _totals_frame(totals: np.ndarray) -> pd.DataFrame:
+    """MEASURE_TOTALS columns of a totals array, with the counts as integers"""
+    frame = pd.DataFrame(totals, columns=MEASURE_TOTALS)
+    counts = [col for col in MEASURE_TOTALS if col == 'count' or col.startswith('n_')]
+    frame[counts] = frame[counts].round().astype(np.int64)
+    return frame
+
+def _epoch_minutes(timestamps: pd.Series) -> tuple:
+    """UTC epoch minute of each timestamp that is present, and which ones are"""
+    valid = timestamps.notna().to_numpy()
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert(None)
+    return timestamps.to_numpy()[valid].astype('datetime64[m]').astype(np.int64), valid
+
+def _minute_starts(minutes: np.ndarray, tz) -> pd.DatetimeIndex:
+    """Start of each UTC epoch minute, in zone tz if the timestamps had one"""
+    times = pd.DatetimeIndex(minutes.astype('datetime64[m]').astype('datetime64[ns]'))
+    if tz is not None:
+        times = times.tz_localize('UTC').tz_convert(tz)
+    return times
+
+class TimeRollups:
+    """
+    MEASURE_TOTALS per bucket of each TIME_RESOLUTIONS resolution, kept in
+    step with a chat log frame as rows are appended and trimmed. A batch of
+    rows only updates the buckets it falls in. Minute buckets are UTC epoch
+    minutes, so they can be read in any zone; coarser buckets follow the wall
+    clock of the timestamps' own zone.
+    """
+    def __init__(self, df: pd.DataFrame = None):
+        self.tz = None
+        self.buckets = {resolution: KeyedTotals([resolution]) for resolution in TIME_RESOLUTIONS}
+        if df is not None:
+            self.add(df)
+
+    def add(self, rows: pd.DataFrame):
+        """Fold rows appended to the frame into every resolution"""
+        self._fold(rows, 1)
+
+    def remove(self, rows: pd.DataFrame):
+        """Subtract folded rows that are being dropped from the frame out of every resolution"""
+        self._fold(rows, -1)
+
+    def _fold(self, rows: pd.DataFrame, sign):
+        if rows.empty or 'timestamp' not in rows.columns:
+            return
+        timestamps = rows['timestamp']
+        self.tz = timestamps.dt.tz
+        minutes, valid = _epoch_minutes(timestamps)
+        # Rows without a timestamp have no bucket to land in
+        totals = pd.DataFrame(_measure_totals(rows))[valid]
+        wall = timestamps.dt.tz_localize(None) if self.tz is not None else timestamps
+        wall = wall.to_numpy()[valid]
+        for resolution, (unit, step, offset) in TIME_RESOLUTIONS.items():
+            if unit == 'm':
+                codes = minutes
+            else:
+                codes = (wall.astype(f'datetime64[{unit}]').astype(np.int64) + offset) // step
+            self.buckets[resolution].fold(codes, totals, sign)
+
+    def resolution_for(self, days=None) -> str:
+        """
+        Finest resolution that shows a time period of `days` (or, for all
+        time, the span of the data) in at most TIMELINE_MAX_POINTS buckets
+        """
+        minutes, _ = self.buckets['minute'].live()
+        if days is not None:
+            span = np.timedelta64(days, 'D')
+        elif len(minutes):
+            span = np.timedelta64(minutes.max() - minutes.min() + 1, 'm')
+        else:
+            span = np.timedelta64(0, 'm')
+        for resolution, (unit, step, offset) in TIME_RESOLUTIONS.items():
+            if span / np.timedelta64(step, unit) <= TIMELINE_MAX_POINTS:
+                return resolution
+        return resolution
+
+    def series(self, resolution) -> pd.DataFrame:
+        """
+        Totals per bucket from the first bucket to the last, with empty
+        buckets filled in. 'time' holds each bucket's wall-clock start.
+        """
+        keys, totals = self.buckets[resolution].live()
+        if not len(keys):
+            return pd.DataFrame(columns=['time', *MEASURE_TOTALS])
+        codes = keys[:, 0]
+        first = codes.min()
+        filled = np.zeros((codes.max() - first + 1, len(MEASURE_TOTALS)))
+        filled[codes - first] = totals
+        buckets = np.arange(first, first + len(filled))
+        unit, step, offset = TIME_RESOLUTIONS[resolution]
+        if unit == 'm':
+            times = _minute_starts(buckets, self.tz)
+            times = times.tz_localize(None) if self.tz is not None else times
+        else:
+            times = (buckets * step - offset).astype(f'datetime64[{unit}]').astype('datetime64[ns]')
+        frame = _totals_frame(filled)
+        frame.insert(0, 'time', times)
+        return frame
+
+    def activity(self) -> pd.DataFrame:
+        """
+        Message count per minute that has any, with each minute's start in
+        the timestamps' own zone, for reading hours of day in other zones
+        """
+        keys, totals = self.buckets['minute'].live()
+        return pd.DataFrame({
+            'time': _minute_starts(keys[:, 0], self.tz),
+            'count': totals[:, 0].round().astype(np.int64),
+        })
+
+class RollupCube:
+    """
+    Per-hour totals of a chat log frame broken down by CUBE_DIMENSIONS, kept
+    in step with the frame as rows are appended and trimmed. Group-by counts
+    and means over hours and these dimensions are answered from the cells, so
+    their cost follows the number of cells rather than rows, and a batch of
+    rows only updates the cells it falls in. Hours are UTC epoch hours.
+    """
+    def __init__(self, df: pd.DataFrame = None):
+        self.tz = None
+        # Dimension values get stable codes in order of first appearance
+        self.vocab = {col: {} for col in CUBE_DIMENSIONS}
+        self.cells = KeyedTotals(['hour', *CUBE_DIMENSIONS])
+        if df is not None:
+            self.add(df)
+
+    def add(self, rows: pd.DataFrame):
+        """Fold rows appended to the frame into the cells"""
+        self._fold(rows, 1)
+
+    def remove(self, rows: pd.DataFrame):
+        """Subtract folded rows that are being dropped from the frame out of the cells"""
+        self._fold(rows, -1)
+
+    def _fold(self, rows: pd.DataFrame, sign):
+        if rows.empty or 'timestamp' not in rows.columns:
+            return
+        self.tz = rows['timestamp'].dt.tz
+        minutes, valid = _epoch_minutes(rows['timestamp'])
+        codes = [minutes // 60]
+        for col in CUBE_DIMENSIONS:
+            codes.append(self._codes(col, rows[col])[valid] if col in rows.columns else np.full(len(minutes), -1))
+        # Rows without a timestamp have no hour to land in
+        self.cells.fold(codes, pd.DataFrame(_measure_totals(rows))[valid], sign)
+
+    def _codes(self, col, values: pd.Series) -> np.ndarray:
+        values = values.astype('category')
+        vocab = self.vocab[col]
+        for value in values.cat.categories:
+            vocab.setdefault(value, len(vocab))
+        # Category code -1 (missing) picks up the trailing -1
+        mapping = np.array([vocab[value] for value in values.cat.categories] + [-1], dtype=np.int64)
+        return mapping[values.cat.codes.to_numpy()]
+
+    def _select(self, dimensions) -> tuple:
+        """Keys and totals of the cells matching the (column, values) selections"""
+        keys, totals = self.cells.live()
+        mask = np.ones(len(keys), dtype=bool)
+        for col, values in dimensions:
+            vocab = self.vocab[col]
+            mask &= np.isin(keys[:, self.cells.names.index(col)], [vocab[value] for value in values if value in vocab])
+        return keys[mask], totals[mask]
+
+    def query(self, by, dimensions=()) -> pd.DataFrame:
+        """
+        Cell totals grouped by `by`, which may name CUBE_DIMENSIONS and 'time'
+        (start of the hour). Only cells matching the (column, values)
+        selections are included. Besides `by`, the result has a count column
+        and n_, sum_ and sumsq_ columns per CUBE_MEASURES.
+        """
+        keys, totals = self._select(dimensions)
+        if not len(keys):
+            return pd.DataFrame(columns=[*by, *MEASURE_TOTALS])
+        cells = _totals_frame(totals)
+        groups = []
+        for key in by:
+            if key == 'time':
+                # Times are derived once per distinct hour, not once per cell
+                hours, inverse = np.unique(keys[:, 0], return_inverse=True)
+                values = _minute_starts(hours * 60, self.tz)[inverse]
+            else:
+                values = pd.Categorical.from_codes(
+                    keys[:, self.cells.names.index(key)], categories=list(self.vocab[key])
+                )
+            groups.append(pd.Series(values, name=key))
+        if not groups:
+            return cells.sum().to_frame().T
+        return cells.groupby(groups, observed=True).sum().reset_index()
+
+# Structures a ChatLogStore keeps in step with its rows. Each is built from the
+# retained frame on first use, then given every batch of rows appended to it
+# and, if it can drop rows, every batch trimmed from it; the others are rebuilt
+STORE_STRUCTURES = {
+    'cube': RollupCube,
+    'timeline': TimeRollups,
+    'moments': CovarianceAccumulator,
+    'terms': TermFrequencies,
+    'search': MessageSearchIndex,
+}
+
+@st.cache_resource(max_entries=16)
+def get_chat_log_store(columns, filters) -> ChatLogStore:
+    """
+    Shared store backing load_chat_log_store across sessions, one per projection
+    and time period. Dimension selections are served from its filter index.
+    """
+    store = ChatLogStore(snapshot_path(columns, filters))
+    store.trim(filter_cutoff(filters))
+    return store
+
+def snapshot_path(columns, filters) -> str:
+    """On-disk snapshot location for a projection and filter set"""
+    key = hashlib.sha1(repr((CHAT_LOGS_TABLE, columns, filters)).encode()).hexdigest()[:16]
+    return os.path.join(SNAPSHOT_DIR, f"{CHAT_LOGS_TABLE}_{key}.arrow")
+
+def make_filter_set(time_period="All Time", selections=None) -> tuple:
+    """
+    Build a hashable filter set from the sidebar selections.
+    Empty selections are dropped, so equivalent filters share a cache entry.
+    """
+    selections = selections or {}
+    dimensions = tuple(
+        (col, tuple(sorted(selections[col])))
+        for col in FILTER_COLUMNS
+        if selections.get(col)
+    )
+    return (time_period, dimensions)
+
+def filter_cutoff(filters):
+    """Earliest timestamp admitted by the filter set's time period, or None for all time"""
+    days = TIME_PERIODS[filters[0]]
+    if days is None:
+        return None
+    return datetime.now().astimezone() - timedelta(days=days)
+
+def _comparable_cutoff(timestamps: pd.Series, cutoff):
+    """Match the cutoff's timezone awareness to the timestamp column"""
+    if timestamps.dt.tz is None:
+        return pd.Timestamp(cutoff).tz_localize(None)
+    return pd.Timestamp(cutoff).tz_convert(timestamps.dt.tz)
+
+def _apply_filter_predicates(query, filters):
+    """
+    Translate the filter set's time period into a PostgREST predicate on the
+    query. Stores are kept per time period, so dimension selections are
+    answered from the filter index rather than pushed down.
+    """
+    cutoff = filter_cutoff(filters)
+    if cutoff is not None:
+        query = query.gte("timestamp", cutoff.isoformat())
+    return query
+
+def apply_filters(df: pd.DataFrame, filters) -> pd.DataFrame:
+    """Apply the filter set in pandas, for data that did not come through Supabase"""
+    cutoff = filter_cutoff(filters)
+    if cutoff is not None and not df.empty:
+        df = df[df['timestamp'] >= _comparable_cutoff(df['timestamp'], cutoff)]
+    for col, values in filters[1]:
+        if col in df.columns:
+            df = df[df[col].isin(values)]
+    return df
+
+def required_columns(views) -> tuple:
+    """
+    Columns to fetch for the given views, plus the timestamp/id columns the
+    watermark needs and the filter columns the filter index needs.
+    """
+    needed = {col for view in views for col in VIEW_COLUMNS[view]} | {'timestamp'} | set(FILTER_COLUMNS)
+    columns = [col for col in CHAT_LOG_COLUMNS if col in needed]
+    if CHAT_LOGS_ID_COLUMN:
+        columns.insert(0, CHAT_LOGS_ID_COLUMN)
+    return tuple(columns)
+
+def apply_chat_log_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast the columns present in the frame to their CHAT_LOG_SCHEMA dtypes"""
+    casts = {}
+    for col, dtype in CHAT_LOG_SCHEMA.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if dtype == 'bool':
+            # Missing flags count as unset
+            casts[col] = df[col].fillna(False).astype(bool)
+        elif col == 'tags' and not pd.api.types.is_integer_dtype(df[col]):
+            casts[col] = encode_tags(df[col].astype(object))
+        else:
+            casts[col] = df[col].astype(dtype)
+    return df.assign(**casts) if casts else df
+
+def tag_mask(tags) -> int:
+    """Bitmask for an iterable of tag names, ignoring tags outside TAG_VOCABULARY"""
+    return sum(TAG_BITS[tag] for tag in {tag.strip() for tag in tags} if tag in TAG_BITS)
+
+def encode_tags(tags: pd.Series) -> pd.Series:
+    """
+    Parse tags into bitmasks over TAG_VOCABULARY. Tags arrive comma-joined
+    (or as lists from a text[] column); each distinct value is parsed once.
+    """
+    # Lists cannot be factorized, so join them like the text form
+    tags = tags.map(lambda value: ','.join(value) if isinstance(value, list) else value)
+    codes, uniques = pd.factorize(tags)
+    unique_masks = np.array([tag_mask(value.split(',')) for value in uniques], dtype=TAG_MASK_DTYPE)
+    masks = np.zeros(len(tags), dtype=TAG_MASK_DTYPE)
+    present = codes >= 0
+    masks[present] = unique_masks[codes[present]]
+    return pd.Series(masks, index=tags.index, name=tags.name)
+
+def decode_tags(masks: pd.Series) -> pd.Series:
+    """Comma-joined tag strings, for display and export only"""
+    labels = {
+        mask: ','.join(tag for tag, bit in TAG_BITS.items() if mask & bit)
+        for mask in masks.unique()
+    }
+    return masks.map(labels)
+
+def tag_matrix(masks: pd.Series) -> np.ndarray:
+    """Boolean rows x TAG_VOCABULARY matrix of the tags set in each mask"""
+    bits = np.arange(len(TAG_VOCABULARY), dtype=TAG_MASK_DTYPE)
+    return ((masks.to_numpy()[:, None] >> bits) & 1).astype(bool)
+
+def tag_counts(masks: pd.Series) -> pd.Series:
+    """Number of rows carrying each tag"""
+    return pd.Series(tag_matrix(masks).sum(axis=0), index=TAG_VOCABULARY)
+
+def concat_chat_logs(frames) -> pd.DataFrame:
+    """
+    Concatenate chat log frames without losing categorical dtypes.
+    pd.concat falls back to object when categories differ, so each
+    categorical column is first widened to the union of the categories.
+    """
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    categories = {}
+    for col in frames[0].columns:
+        if all(col in frame.columns and isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames):
+            categories[col] = pd.api.types.union_categoricals([frame[col] for frame in frames]).categories
+    frames = [
+        frame.assign(**{col: frame[col].cat.set_categories(cats) for col, cats in categories.items()})
+        for frame in frames
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+def _page_to_frame(page) -> pd.DataFrame:
+    """Convert one page of JSON records into a typed column chunk"""
+    chunk = pd.DataFrame.from_records(page)
+    if 'timestamp' in chunk.columns:
+        chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+    return apply_chat_log_schema(chunk)
+
+def _fetch_rows(columns, filters, since=None) -> pd.DataFrame:
+    """Rows from the configured source: the CHAT_LOGS_DATASET if set, otherwise Supabase"""
+    if CHAT_LOGS_DATASET:
+        return _read_chat_log_dataset(CHAT_LOGS_DATASET, columns, filters, since)
+    return _fetch_chat_log_rows(get_supabase_client(), columns, filters, since)
+
+def _read_chat_log_dataset(path, columns, filters, since=None) -> pd.DataFrame:
+    """
+    Read chat log rows from a Parquet dataset written by write_chat_log_dataset,
+    with the same projection, time period, watermark and ordering as a
+    Supabase fetch. The time period also prunes whole date partitions.
+    """
+    dataset = ds.dataset(path, format='parquet', partitioning=DATASET_PARTITIONING)
+    predicates = []
+    cutoff = filter_cutoff(filters)
+    if cutoff is not None:
+        cutoff = pd.Timestamp(cutoff).tz_convert('UTC')
+        predicates += [ds.field('date') >= cutoff.date(), ds.field('timestamp') >= cutoff]
+    if since is not None:
+        if CHAT_LOGS_ID_COLUMN:
+            predicates.append(ds.field('timestamp') >= since)
+        else:
+            predicates.append(ds.field('timestamp') > since)
+    expression = None
+    for predicate in predicates:
+        expression = predicate if expression is None else expression & predicate
+    table = dataset.to_table(columns=[col for col in columns if col in dataset.schema.names], filter=expression)
+    if not table.num_rows:
+        return pd.DataFrame()
+    order = [('timestamp', 'ascending')]
+    if CHAT_LOGS_ID_COLUMN in table.column_names:
+        order.append((CHAT_LOGS_ID_COLUMN, 'ascending'))
+    return apply_chat_log_schema(table.sort_by(order).to_pandas())
+
+def _chat_log_page_query(supabase: Client, columns, filters, since=None, count=None):
+    """Build the ordered, filtered query that pages are ranged over"""
+    query = _apply_filter_predicates(
+        supabase.table(CHAT_LOGS_TABLE).select(",".join(columns), count=count), filters
+    )
+    if since is not None:
+        # With ids we can re-read the watermark timestamp and drop duplicates,
+        # so rows sharing the last-seen timestamp are not lost
+        if CHAT_LOGS_ID_COLUMN:
+            query = query.gte("timestamp", since.isoformat())
+        else:
+            query = query.gt("timestamp", since.isoformat())
+    # A stable order keeps offsets consistent between pages. PostgREST takes
+    # one order parameter, so the id tiebreak goes in the same one
+    return query.order(f"timestamp,{CHAT_LOGS_ID_COLUMN}" if CHAT_LOGS_ID_COLUMN else "timestamp")
+
+def _fetch_chat_log_rows(supabase: Client, columns, filters, since=None) -> pd.DataFrame:
+    """
+    Fetch chat log rows matching the filter set page by page, optionally only
+    those at or after the `since` watermark. The first page also returns an
+    estimated row count, which is exact for small results so they end there,
+    while larger ones only get the planner's estimate instead of a full
+    count. The remaining pages are fetched FETCH_CONCURRENCY at a time and
+    reassembled in order until one comes back short, so a wrong estimate
+    cannot cut the fetch off. Each page is converted to a typed chunk as
+    soon as it arrives so the raw JSON for the whole table is never held at once.
+    """
+    # The end of the range is exclusive
+    first = execute_with_retry(
+        _chat_log_page_query(supabase, columns, filters, since, count="estimated").range(0, FETCH_PAGE_SIZE)
+    )
+    if not first.data:
+        return pd.DataFrame()
+    chunks = [_page_to_frame(first.data)]
+    
+    # Stride by what the server actually returned in case it caps pages below FETCH_PAGE_SIZE
+    page_size = len(first.data)
+    
+    def fetch_page(start):
+        query = _chat_log_page_query(supabase, columns, filters, since)
+        page = execute_with_retry(query.range(start, start + page_size)).data
+        return len(page), _page_to_frame(page) if page else None
+    
+    # A short first page that the count agrees with is the whole result; otherwise
+    # it may just be the server's cap on page size
+    start = page_size
+    done = page_size < FETCH_PAGE_SIZE and first.count == page_size
+    with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as pool:
+        while not done:
+            starts = range(start, start + page_size * FETCH_CONCURRENCY, page_size)
+            # map() yields results in submission order, so chunks stay sorted
+            for rows, chunk in pool.map(fetch_page, starts):
+                if chunk is not None:
+                    chunks.append(chunk)
+                if rows < page_size:
+                    done = True
+                    break
+            start += page_size * FETCH_CONCURRENCY
+    return concat_chat_logs(chunks)
+
+@st.cache_data(ttl=CHAT_LOGS_TTL)
+def fetch_chat_log_details(ids) -> pd.DataFrame:
+    """
+    The explorer_details columns of the chat logs with the given ids, from
+    the configured source. Supabase is asked DETAILS_BATCH_SIZE ids at a
+    time, FETCH_CONCURRENCY requests at once.
+    """
+    columns = [CHAT_LOGS_ID_COLUMN, *VIEW_COLUMNS['explorer_details']]
+    if CHAT_LOGS_DATASET:
+        dataset = ds.dataset(CHAT_LOGS_DATASET, format='parquet', partitioning=DATASET_PARTITIONING)
+        table = dataset.to_table(
+            columns=[col for col in columns if col in dataset.schema.names],
+            filter=ds.field(CHAT_LOGS_ID_COLUMN).isin(list(ids))
+        )
+        return apply_chat_log_schema(table.to_pandas())
+    supabase = get_supabase_client()
+    
+    def fetch_batch(batch):
+        query = supabase.table(CHAT_LOGS_TABLE).select(",".join(columns)).in_(CHAT_LOGS_ID_COLUMN, batch)
+        return _page_to_frame(execute_with_retry(query).data)
+    
+    batches = [ids[start:start + DETAILS_BATCH_SIZE] for start in range(0, len(ids), DETAILS_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as pool:
+        return concat_chat_logs(list(pool.map(fetch_batch, batches)))
+
+def load_chat_log_store(columns=None, period=None, feed=None) -> ChatLogStore:
+    """
+    Chat log store for a time period, topped up from Supabase.
+    Only the requested columns are fetched (by default those the active views
+    need). The time period is applied by Supabase, and dimension selections
+    are answered by the store from its filter index, so changing a
+    multiselect does not refetch.
+    Rows newer than the last-seen watermark are fetched and appended to the
+    retained frame; every RECONCILE_INTERVAL the rows are reloaded in full.
+    The retained frame is snapshotted to SNAPSHOT_DIR so restarts come up warm.
+    Given a change feed, pushed inserts are appended between fetches.
+    The store is shared, so read it through ChatLogStore.read and do not
+    modify the frames it returns in place.
+    """
+    if columns is None:
+        columns = required_columns(ACTIVE_VIEWS)
+    if period is None:
+        period = make_filter_set()
+    store = get_chat_log_store(columns, period)
+    with store.lock:
+        _refresh_chat_log_store(store, columns, period, feed)
+    return store
+
+def _refresh_chat_log_store(store: ChatLogStore, columns, period, feed=None):
+    """Top up a store from Supabase or the change feed once it is stale; call with its lock held"""
+    now = datetime.now()
+    if store.reconciled_at is not None and store.needs_reconcile(now) and not store.reconciling:
+        # Sessions keep reading the retained rows while the full reload runs
+        store.reconciling = True
+        threading.Thread(
+            target=_reconcile_chat_log_store, args=(store, columns, period), name="chat-log-reconcile", daemon=True
+        ).start()
+    if store.is_fresh(now) and (feed is None or store.apply_feed(feed, columns, period)):
+        return
+    # Rows pushed from here on may overlap the fetch; apply_feed drops those by id
+    feed_seq = feed.seq if feed is not None else store.feed_seq
     try:
         with st.spinner("Fetching data from Supabase..."):
-            supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-            response = supabase.table("chat_logs").select("*").execute()
-            data = response.data
-            if not data:
-                return pd.DataFrame()
-            df = pd.DataFrame(data)
-            if 'timestamp' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-            return df
+            if store.reconciled_at is None:
+                # Nothing to serve yet, so the first full load is waited for
+                store.replace(_fetch_rows(columns, period), now)
+            else:
+                store.append(_fetch_rows(columns, period, since=store.watermark))
+                store.trim(filter_cutoff(period))
     except Exception as e:
         st.error(f"Error fetching data: {e}")
-        return pd.DataFrame()
+    try:
+        store.save_snapshot()
+    except Exception as e:
+        st.warning(f"Could not write chat log snapshot: {e}")
+    store.fetched_at = now
+    store.feed_seq = feed_seq
 
-def generate_random_data(n=100) -> pd.DataFrame:
+def _reconcile_chat_log_store(store: ChatLogStore, columns, period):
+    """
+    Reload a store's rows in full and swap them in. The structures it keeps
+    are rebuilt before taking the lock, so readers only wait for the swap.
+    """
+    now = datetime.now()
+    try:
+        df = _fetch_rows(columns, period).reset_index(drop=True)
+        with store.lock:
+            names = list(store.structures)
+        structures = {name: STORE_STRUCTURES[name](df) for name in names}
+        with store.lock:
+            store.replace(df, now, structures)
+            # Rows appended during the reload went with the old frame, so fetch past the new watermark
+            store.fetched_at = None
+            store.save_snapshot()
+    except Exception:
+        # The next refresh tries again, since reconciled_at was not advanced
+        logger.exception("Full reload of %s rows failed", CHAT_LOGS_TABLE)
+    finally:
+        store.reconciling = False
+
+@st.cache_data(ttl=CHAT_LOGS_TTL)
+def chat_logs_available() -> bool:
+    """Check whether the chat_logs table (or the CHAT_LOGS_DATASET) can be reached and has any rows"""
+    if CHAT_LOGS_DATASET:
+        return os.path.isdir(CHAT_LOGS_DATASET) and bool(os.listdir(CHAT_LOGS_DATASET))
+    try:
+        supabase = get_supabase_client()
+        response = execute_with_retry(supabase.table(CHAT_LOGS_TABLE).select("timestamp").limit(1))
+        return bool(response.data)
+    except Exception as e:
+        st.error(f"Error fetching data: {e}")
+        return False
+
+def generate_random_data(n=100, seed=None, end=None) -> pd.DataFrame:
     """
     Generate random chat log data for demonstration with more realistic patterns.
+    Columns are drawn as whole arrays from a NumPy generator, so large demos
+    are cheap. Timestamps fall in the two weeks before `end` (default now),
+    so passing both a seed and an end makes the data reproducible.
     """
-    # Create more realistic conversation patterns
-    num_conversations = max(5, n // 15)
-    conv_ids = [str(uuid.uuid4()) for _ in range(num_conversations)]
-    
-    # Create user profiles with characteristics
+    return next(generate_chat_log_chunks(n, chunk_size=max(n, 1), seed=seed, end=end), pd.DataFrame())
+
+def generate_chat_log_chunks(rows, chunk_size=DATASET_CHUNK_SIZE, seed=None, num_conversations=None,
+                             num_users=None, days=14, end=None):
+    """
+    Yield generated chat logs in chunks of at most `chunk_size` rows, so any
+    number of rows can be produced in bounded memory. Users and conversations
+    are shared across chunks; timestamps fall within `days` days before `end`
+    (default now).
+    """
+    rng = np.random.default_rng(seed)
+    user_profiles = _demo_user_profiles(num_users, rng)
+    if num_conversations is None:
+        num_conversations = max(5, rows // 15)
+    # Conversation ids are derived from their number, so chunks agree without holding them all
+    namespace = uuid.UUID(bytes=rng.bytes(16))
+    end = datetime.now() if end is None else end
+    for start in range(0, rows, chunk_size):
+        yield _generate_chat_log_chunk(
+            rng, min(chunk_size, rows - start), user_profiles, namespace, num_conversations, days, end
+        )
+
+def write_chat_log_dataset(path, rows, chunk_size=DATASET_CHUNK_SIZE, seed=None, num_conversations=None,
+                           num_users=None, days=14) -> int:
+    """
+    Generate `rows` chat logs chunk by chunk into a Parquet dataset at `path`,
+    partitioned by date. Rows get sequential ids, UTC timestamps and text
+    tags like the Supabase table, so the data layer can read the dataset in
+    its place (see CHAT_LOGS_DATASET). Returns the number of rows written.
+    """
+    chunks = generate_chat_log_chunks(
+        rows, chunk_size, seed=seed, num_conversations=num_conversations,
+        num_users=num_users, days=days, end=pd.Timestamp.now(tz='UTC')
+    )
+    if os.path.isdir(path) and os.listdir(path):
+        raise FileExistsError(f"{path} already holds data")
+    written = 0
+    for i, chunk in enumerate(chunks):
+        if CHAT_LOGS_ID_COLUMN:
+            chunk.insert(0, CHAT_LOGS_ID_COLUMN, np.arange(written + 1, written + len(chunk) + 1))
+        # Store plain text as Supabase would; the schema is applied again on read
+        categorical = [col for col in chunk.columns if isinstance(chunk[col].dtype, pd.CategoricalDtype)]
+        chunk = chunk.astype({col: object for col in categorical})
+        chunk['tags'] = decode_tags(chunk['tags'])
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        # One file per chunk in each date=YYYY-MM-DD partition it touches
+        for day, positions in chunk.groupby(chunk['timestamp'].dt.date).indices.items():
+            directory = os.path.join(path, f"date={day.isoformat()}")
+            os.makedirs(directory, exist_ok=True)
+            pq.write_table(table.take(positions), os.path.join(directory, f"part-{i:05d}.parquet"))
+        written += len(chunk)
+    return written
+
+def _demo_user_profiles(num_users, rng) -> dict:
+    """The five demo user profiles, or `num_users` profiles with drawn characteristics"""
     user_profiles = {
         'user1': {'verbosity': 'high', 'sentiment_bias': 0.3, 'response_time_factor': 0.8, 'avatar': 'https://randomuser.me/api/portraits/men/32.jpg'},
         'user2': {'verbosity': 'medium', 'sentiment_bias': -0.2, 'response_time_factor': 1.2, 'avatar': 'https://randomuser.me/api/portraits/women/44.jpg'},
@@ -448,6 +1997,25 @@ def generate_random_data(n=100) -> pd.DataFrame:
         'user4': {'verbosity': 'high', 'sentiment_bias': -0.4, 'response_time_factor': 0.7, 'avatar': 'https://randomuser.me/api/portraits/women/33.jpg'},
         'user5': {'verbosity': 'medium', 'sentiment_bias': 0.5, 'response_time_factor': 1.1, 'avatar': 'https://randomuser.me/api/portraits/men/91.jpg'},
     }
+    if num_users is None:
+        return user_profiles
+    user_profiles = dict(list(user_profiles.items())[:num_users])
+    for i in range(len(user_profiles) + 1, num_users + 1):
+        user_profiles[f'user{i}'] = {
+            'verbosity': rng.choice(['high', 'medium', 'low']),
+            'sentiment_bias': round(rng.uniform(-0.5, 0.5), 1),
+            'response_time_factor': round(rng.uniform(0.7, 1.2), 1),
+            'avatar': f"https://randomuser.me/api/portraits/{rng.choice(['men', 'women'])}/{i % 100}.jpg",
+        }
+    return user_profiles
+
+def _generate_chat_log_chunk(rng, n, user_profiles, namespace, num_conversations, days, end) -> pd.DataFrame:
+    """One chunk of generated chat logs; see generate_chat_log_chunks"""
+    users = list(user_profiles)
+    profiles = list(user_profiles.values())
+    
+    # Inclusive message length range for each verbosity
+    length_ranges = {'high': (50, 200), 'medium': (20, 80), 'low': (5, 30)}
     
     # Common topics and phrases
     topics = ['account issues', 'product inquiry', 'technical support', 'billing questions', 'feature requests']
@@ -461,254 +2029,883 @@ def generate_random_data(n=100) -> pd.DataFrame:
         'feature requests': 'https://images.unsplash.com/photo-1596079890744-c1a0462d0975?ixlib=rb-1.2.1&auto=format&fit=crop&w=300&q=80'
     }
     
+    intents = ['question', 'complaint', 'feedback', 'request', 'information']
+    regions = ['North America', 'Europe', 'Asia', 'South America', 'Africa', 'Oceania']
+    resolution_statuses = ['resolved', 'pending', 'escalated', 'closed', 'reopened']
+    
     # Generate data with patterns
-    data = []
-    for _ in range(n):
-        conv_id = random.choice(conv_ids)
-        user_id = random.choice(list(user_profiles.keys()))
-        profile = user_profiles[user_id]
-        
-        # Generate message based on verbosity
-        topic = random.choice(topics)
-        if profile['verbosity'] == 'high':
-            msg_length = random.randint(50, 200)
-        elif profile['verbosity'] == 'medium':
-            msg_length = random.randint(20, 80)
-        else:
-            msg_length = random.randint(5, 30)
-            
-        user_message = f"Topic: {topic}. " + "Lorem ipsum " * (msg_length // 10)
-        chatbot_reply = f"Response about {topic}. " + "Lorem ipsum " * (msg_length // 12)
-        
-        # Response time based on profile and message length
-        base_response_time = 0.5 + (msg_length / 100)
-        response_time = round(base_response_time * profile['response_time_factor'] * random.uniform(0.8, 1.2), 2)
-        
-        # Sentiment with bias from profile
-        sentiment_base = random.uniform(-0.7, 0.7)
-        sentiment_score = round(min(1.0, max(-1.0, sentiment_base + profile['sentiment_bias'])), 2)
-        
-        if sentiment_score > 0.3:
-            sentiment_label = 'positive'
-        elif sentiment_score < -0.3:
-            sentiment_label = 'negative'
+    user = rng.integers(len(users), size=n)
+    topic = rng.integers(len(topics), size=n)
+    
+    # Message length based on the user's verbosity
+    low = np.array([length_ranges[p['verbosity']][0] for p in profiles])[user]
+    high = np.array([length_ranges[p['verbosity']][1] for p in profiles])[user]
+    msg_length = rng.integers(low, high + 1)
+    
+    # Messages only vary by topic and length, so build each distinct one once
+    max_length = max(high for _, high in length_ranges.values())
+    user_messages = np.array([
+        [f"Topic: {t}. " + "Lorem ipsum " * k for k in range(max_length // 10 + 1)] for t in topics
+    ], dtype=object)
+    chatbot_replies = np.array([
+        [f"Response about {t}. " + "Lorem ipsum " * k for k in range(max_length // 12 + 1)] for t in topics
+    ], dtype=object)
+    message_lengths = np.vectorize(len, otypes=[np.int32])(user_messages)
+    
+    # Response time based on profile and message length
+    factor = np.array([p['response_time_factor'] for p in profiles])[user]
+    base_response_time = 0.5 + (msg_length / 100)
+    response_time = np.round(base_response_time * factor * rng.uniform(0.8, 1.2, size=n), 2)
+    
+    # Sentiment with bias from profile
+    bias = np.array([p['sentiment_bias'] for p in profiles])[user]
+    sentiment_score = np.round(np.clip(rng.uniform(-0.7, 0.7, size=n) + bias, -1.0, 1.0), 2)
+    sentiment_labels = ['negative', 'neutral', 'positive']
+    sentiment = np.where(sentiment_score > 0.3, 2, np.where(sentiment_score < -0.3, 0, 1))
+    
+    # Timestamp with realistic patterns (more activity during business hours)
+    end = pd.Timestamp(end)
+    days_ago = rng.integers(0, days + 1, size=n)
+    hour_weights = np.array([1, 1, 1, 1, 1, 2, 5, 10, 15, 20, 18, 15, 20, 18, 15, 12, 10, 8, 5, 3, 2, 2, 1, 1])
+    hour = rng.choice(24, size=n, p=hour_weights / hour_weights.sum())
+    timestamp = end - pd.to_timedelta(days_ago, unit='D') - pd.to_timedelta(end.hour - hour, unit='h')
+    # Today's hours after `end` have not happened yet, so those chats fall on the day before
+    timestamp = timestamp.where(timestamp <= end, timestamp - pd.Timedelta(days=1))
+    
+    # Drop-off more likely for negative sentiment or long response times
+    drop_off_prob = 0.1 + 0.3 * (sentiment_score < -0.5) + 0.3 * (response_time > 1.5)
+    drop_off = rng.random(n) < drop_off_prob
+    
+    # Add up to two distinct tags for categorization, straight into the tag bitmask
+    tag_count = rng.integers(0, 3, size=n)
+    first_tag = rng.integers(len(TAG_VOCABULARY), size=n)
+    second_tag = (first_tag + rng.integers(1, len(TAG_VOCABULARY), size=n)) % len(TAG_VOCABULARY)
+    tag_bits = np.array(list(TAG_BITS.values()), dtype=TAG_MASK_DTYPE)
+    tags = np.where(tag_count >= 1, tag_bits[first_tag], 0) | np.where(tag_count >= 2, tag_bits[second_tag], 0)
+    
+    # Add user satisfaction score
+    satisfaction = pd.array(rng.integers(1, 6, size=n), dtype='Int8')
+    satisfaction[rng.random(n) >= 0.7] = pd.NA  # 70% chance of having a satisfaction score
+    
+    def categorical(codes, categories):
+        return pd.Categorical.from_codes(codes, categories=categories)
+    
+    # Generated profiles can share an avatar
+    avatar_codes, avatars = pd.factorize(np.array([p['avatar'] for p in profiles]))
+    
+    conversations, conversation = np.unique(rng.integers(num_conversations, size=n), return_inverse=True)
+    conv_ids = np.array([str(uuid.uuid5(namespace, str(c))) for c in conversations])
+    
+    df = pd.DataFrame({
+        "conversation_id": conv_ids[conversation],
+        "user_id": categorical(user, users),
+        "user_message": user_messages[topic, msg_length // 10],
+        "chatbot_reply": chatbot_replies[topic, msg_length // 12],
+        "response_time": response_time.astype(np.float32),
+        "timestamp": timestamp,
+        "sentiment_label": categorical(sentiment, sentiment_labels),
+        "sentiment_score": sentiment_score.astype(np.float32),
+        "drop_off": drop_off,
+        "message_length": message_lengths[topic, msg_length // 10],
+        "intent": categorical(rng.integers(len(intents), size=n), intents),
+        "tags": tags.astype(TAG_MASK_DTYPE),
+        "region": categorical(rng.integers(len(regions), size=n), regions),
+        "topic": categorical(topic, topics),
+        "topic_image": categorical(topic, [topic_images[t] for t in topics]),
+        "user_avatar": categorical(avatar_codes[user], avatars),
+        "satisfaction": satisfaction,
+        "resolution_status": categorical(rng.integers(len(resolution_statuses), size=n), resolution_statuses),
+        "first_time_user": rng.random(n) < 0.3,  # 30% chance of being a first-time user
+        "response_quality": np.round(rng.uniform(0.5, 1.0, size=n), 2).astype(np.float32)
+    })
+    
+    return apply_chat_log_schema(df)
+
+# -----------------------------
+# PUSH UPDATES
+# -----------------------------
+class ChangeFeed:
+    """
+    Process-wide buffer of inserted chat log rows, filled by a background
+    listener. Every row gets a sequence number, so stores and sessions only
+    need to remember the last one they saw to catch up or to tell whether
+    anything changed. Sessions watching the feed are rerun by a background
+    thread once rows they show arrive.
+    """
+    def __init__(self):
+        self.seq = 0
+        self.rows = deque(maxlen=CHANGE_FEED_RETENTION)
+        self.condition = threading.Condition()
+        self.connected = False
+        self.error = None  # Why the listener last lost its connection
+        self.watchers = {}  # Session id -> (filter set, last seen sequence, fallback rerun time)
+
+    def set_health(self, connected, error=None):
+        with self.condition:
+            self.connected = connected
+            self.error = error
+            self.condition.notify_all()
+
+    def publish(self, records):
+        with self.condition:
+            for record in records:
+                self.seq += 1
+                self.rows.append((self.seq, record))
+            self.condition.notify_all()
+
+    def reset(self):
+        """Mark a gap, e.g. after a reconnect, so every reader falls back to fetching"""
+        with self.condition:
+            self.rows.clear()
+            self.seq += 1
+            self.condition.notify_all()
+
+    def since(self, seq):
+        """Records published after `seq` and the latest sequence, or None if some were dropped"""
+        with self.condition:
+            if seq < self.seq - len(self.rows):
+                return None
+            return [record for s, record in self.rows if s > seq], self.seq
+
+    def watch(self, session_id, filters, seq):
+        """Rerun a session once rows matching its filter set are published after `seq`"""
+        with self.condition:
+            self.watchers[session_id] = (filters, seq, time.monotonic() + CHAT_LOGS_TTL)
+            self.condition.notify_all()
+
+    def _rewatch(self, session_id, watcher, replacement=None):
+        """Swap a session's watcher, unless the session has registered a newer one meanwhile"""
+        with self.condition:
+            if self.watchers.get(session_id) is watcher:
+                if replacement is None:
+                    del self.watchers[session_id]
+                else:
+                    self.watchers[session_id] = replacement
+
+@st.cache_resource
+def get_change_feed(source) -> ChangeFeed:
+    """
+    Start the listener for a change feed source once per process:
+    'realtime' subscribes to Supabase Realtime, 'local' publishes generated
+    rows as a stand-in for demo data.
+    """
+    feed = ChangeFeed()
+    target = _listen_realtime_inserts if source == 'realtime' else _publish_local_inserts
+    threading.Thread(target=target, args=(feed,), name=f"chat-log-{source}-feed", daemon=True).start()
+    threading.Thread(target=_rerun_watchers, args=(feed,), name=f"chat-log-{source}-reruns", daemon=True).start()
+    return feed
+
+def _rerun_watchers(feed: ChangeFeed):
+    """
+    Rerun each watching session once the feed publishes rows inside its
+    filter set, or drops rows it never saw. While the listener is down,
+    sessions are rerun every CHAT_LOGS_TTL seconds so they refetch instead.
+    """
+    while True:
+        with feed.condition:
+            feed.condition.wait(timeout=1)
+            watchers = dict(feed.watchers)
+            connected = feed.connected
+        for session_id, watcher in watchers.items():
+            filters, seq, rerun_at = watcher
+            try:
+                if _session_closed(session_id):
+                    # Closed sessions never rerun, so their watchers would pile up
+                    feed._rewatch(session_id, watcher)
+                    continue
+                pending = feed.since(seq)
+                if pending is None:
+                    due = True
+                else:
+                    records, latest = pending
+                    due = bool(records) and not apply_filters(_page_to_frame(records), filters).empty
+                    due = due or (not connected and time.monotonic() >= rerun_at)
+                if due:
+                    feed._rewatch(session_id, watcher)
+                    _request_rerun(session_id)
+                elif latest > seq:
+                    # Rows outside the filter set need not be looked at again
+                    feed._rewatch(session_id, watcher, (filters, latest, rerun_at))
+            except Exception:
+                logger.exception("Checking new chats for session %s failed", session_id)
+
+def push_reruns_supported() -> bool:
+    """
+    Whether this Streamlit release is in PUSH_RERUN_STREAMLIT_RANGE, so the
+    private session API behind _request_rerun and _session_closed can be used
+    """
+    release = tuple(int(part) for part in re.findall(r'\d+', st.__version__)[:2])
+    first, last = PUSH_RERUN_STREAMLIT_RANGE
+    return first <= release < last
+
+def _session_info(session_id):
+    """Streamlit's record of a connected browser session, or None (private API)"""
+    if not Runtime.exists():
+        return None
+    return Runtime.instance()._session_mgr.get_active_session_info(session_id)
+
+def _session_closed(session_id) -> bool:
+    """Whether a watching session has disconnected; without a runtime nothing can be told"""
+    return Runtime.exists() and _session_info(session_id) is None
+
+def _request_rerun(session_id):
+    """Ask a browser session to rerun its script, as Streamlit does when the source changes (private API)"""
+    info = _session_info(session_id)
+    if info is not None:
+        info.session.request_rerun(info.session._client_state)
+
+def _listen_realtime_inserts(feed: ChangeFeed):
+    """Publish chat_logs inserts from Supabase Realtime, reconnecting with backoff"""
+    url = (
+        SUPABASE_URL.replace("http", "ws", 1).rstrip("/")
+        + f"/realtime/v1/websocket?apikey={SUPABASE_KEY}&vsn=1.0.0"
+    )
+    topic = f"realtime:public:{CHAT_LOGS_TABLE}"
+    join = {
+        "topic": topic,
+        "event": "phx_join",
+        "ref": "1",
+        "payload": {
+            "config": {
+                "postgres_changes": [{"event": "INSERT", "schema": "public", "table": CHAT_LOGS_TABLE}]
+            },
+            "access_token": SUPABASE_KEY,
+        },
+    }
+    
+    async def heartbeat(socket):
+        while True:
+            await asyncio.sleep(REALTIME_HEARTBEAT_INTERVAL)
+            await socket.send(json.dumps({"topic": "phoenix", "event": "heartbeat", "payload": {}, "ref": "hb"}))
+    
+    async def listen():
+        async with websockets.connect(url) as socket:
+            await socket.send(json.dumps(join))
+            # Inserts made while disconnected were missed, so readers refetch from their watermark
+            feed.reset()
+            beats = asyncio.create_task(heartbeat(socket))
+            try:
+                async for message in socket:
+                    message = json.loads(message)
+                    if message.get("topic") != topic:
+                        continue
+                    if message.get("event") == "phx_reply" and message.get("ref") == join["ref"]:
+                        if message["payload"].get("status") != "ok":
+                            raise RuntimeError(f"Realtime join rejected: {message['payload'].get('response')}")
+                        feed.set_health(True)
+                    elif message.get("event") == "postgres_changes":
+                        feed.publish([message["payload"]["data"]["record"]])
+            finally:
+                beats.cancel()
+    
+    delay = SUPABASE_RETRY_BACKOFF
+    while True:
+        started = time.monotonic()
+        try:
+            asyncio.run(listen())
+            error = "connection closed"
+        except Exception as e:
+            logger.warning("Realtime listener for %s failed", CHAT_LOGS_TABLE, exc_info=True)
+            # The socket URL carries the API key, and the error is shown in the UI
+            error = str(e).replace(SUPABASE_KEY, "***") or type(e).__name__
+        feed.set_health(False, error)
+        # Only back off when the socket keeps dropping straight away
+        if time.monotonic() - started > REALTIME_HEARTBEAT_INTERVAL:
+            delay = SUPABASE_RETRY_BACKOFF
+        time.sleep(delay + random.uniform(0, delay / 2))
+        delay = min(delay * 2, 60)
+
+def _publish_local_inserts(feed: ChangeFeed):
+    """Stand-in for Realtime: publish a few generated chats every LOCAL_FEED_INTERVAL seconds"""
+    feed.set_health(True)
+    while True:
+        time.sleep(LOCAL_FEED_INTERVAL)
+        rows = generate_random_data(random.randint(1, 3))
+        rows['timestamp'] = datetime.now()
+        feed.publish(rows.to_dict('records'))
+
+def load_demo_store(period, feed=None) -> ChatLogStore:
+    """
+    Chat log store over generated demo data for a time period. Without a
+    change feed the data is regenerated every run; with one, it is kept for
+    the session and topped up with the feed's rows.
+    """
+    if feed is None:
+        store = ChatLogStore()
+        store.replace(apply_filters(generate_random_data(100), period), datetime.now())
+        return store
+    if 'demo_df' not in st.session_state:
+        st.session_state.demo_df = generate_random_data(100)
+        st.session_state.demo_feed_seq = feed.seq
+        st.session_state.demo_stores = {}
+    stores = st.session_state.demo_stores
+    if period not in stores:
+        # Replays the feed from when the demo data was generated
+        store = ChatLogStore()
+        store.replace(apply_filters(st.session_state.demo_df, period), datetime.now())
+        store.feed_seq = st.session_state.demo_feed_seq
+        stores[period] = store
+    store = stores[period]
+    with store.lock:
+        if not store.apply_feed(feed, CHAT_LOG_COLUMNS, period):
+            store.feed_seq = feed.seq
+        store.trim(filter_cutoff(period))
+    return store
+
+def watch_for_new_chats(feed: ChangeFeed, filters, seq):
+    """
+    Have the feed rerun this session once rows newer than `seq` arrive
+    inside its filter set, rather than holding the script thread, and show
+    whether the feed is up.
+    """
+    if not push_reruns_supported():
+        st.caption(f"🟠 Live updates are not available on Streamlit {st.__version__} · new chats show on the next refresh")
+        return
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        feed.watch(ctx.session_id, filters, seq)
+    if feed.connected:
+        st.caption(f"🟢 Live · updates when new chats arrive · {datetime.now():%H:%M:%S}")
+    elif feed.error:
+        st.caption(f"🟠 Live updates unavailable ({feed.error}) · refreshing every {CHAT_LOGS_TTL // 60} minutes")
+    else:
+        st.caption("⚪ Live updates connecting…")
+
+# -----------------------------
+# AGGREGATE FUNCTIONS
+# -----------------------------
+class SqliteAggregateStandIn:
+    """
+    Offline stand-in for the Postgres aggregate functions.
+    Loads chat log rows into an in-memory SQLite database and answers the same
+    rpc() calls as the Supabase client, so aggregate mode runs without Postgres.
+    """
+    def __init__(self, df: pd.DataFrame):
+        self.tz = df['timestamp'].dt.tz
+        rows = pd.DataFrame({
+            # Epoch nanoseconds keep range filters numeric in SQLite without
+            # rounding rows from just before the cutoff into the window
+            'timestamp': df['timestamp'].astype('int64'),
+            'user_id': df['user_id'].astype(str),
+            'response_time': df['response_time'].astype(float),
+            'sentiment_label': df['sentiment_label'].astype(str),
+            'drop_off': df['drop_off'].astype(int),
+            **{col: df[col].astype(str) for col in FILTER_COLUMNS if col not in ('user_id', 'sentiment_label')},
+        })
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        rows.to_sql(CHAT_LOGS_TABLE, self.conn, index=False)
+
+    def _where(self, params):
+        clauses, args = [], []
+        if params.get('since') is not None:
+            since = pd.Timestamp(params['since'])
+            if self.tz is None:
+                # Naive rows are stored as wall-clock epochs, so compare wall clock too
+                since = since.tz_localize(None)
+            clauses.append("timestamp >= ?")
+            args.append(since.value)
+        for col in FILTER_COLUMNS:
+            values = params.get(f"{col}_in")
+            if values is not None:
+                clauses.append(f"{col} in ({', '.join('?' * len(values))})")
+                args.extend(values)
+        return (" where " + " and ".join(clauses) if clauses else ""), args
+
+    def rpc(self, fn, params):
+        where, args = self._where(params)
+        if fn == 'chat_log_kpis':
+            sql = (
+                "select count(*) as total_messages, count(distinct user_id) as unique_users, "
+                "avg(response_time) as avg_response_time, "
+                "avg(sentiment_label = 'positive') as positive_ratio, avg(drop_off) as drop_off_rate "
+                f"from {CHAT_LOGS_TABLE}{where}"
+            )
+        elif fn == 'chat_log_daily_counts':
+            sql = (
+                "select date(timestamp / 1000000000, 'unixepoch') as day, count(*) as message_count "
+                f"from {CHAT_LOGS_TABLE}{where} group by 1 order by 1"
+            )
+        elif fn == 'chat_log_filter_options':
+            sql = " union ".join(
+                f"select distinct '{col}' as filter_column, {col} as value from {CHAT_LOGS_TABLE}{where}"
+                for col in FILTER_COLUMNS
+            )
+            args = args * len(FILTER_COLUMNS)
         else:
-            sentiment_label = 'neutral'
-            
-        # Timestamp with realistic patterns (more activity during business hours)
-        now = datetime.now()
-        days_ago = random.randint(0, 14)
-        hour = random.choices(
-            range(24), 
-            weights=[1, 1, 1, 1, 1, 2, 5, 10, 15, 20, 18, 15, 20, 18, 15, 12, 10, 8, 5, 3, 2, 2, 1, 1]
-        )[0]
-        timestamp = now - timedelta(days=days_ago, hours=now.hour-hour)
-        
-        # Drop-off more likely for negative sentiment or long response times
-        drop_off_prob = 0.1 + (0.3 if sentiment_score < -0.5 else 0) + (0.3 if response_time > 1.5 else 0)
-        drop_off = random.random() < drop_off_prob
-        
-        # Add some user intent classification
-        intents = ['question', 'complaint', 'feedback', 'request', 'information']
-        intent = random.choice(intents)
-        
-        # Add some tags for categorization
-        tags = random.sample(['urgent', 'resolved', 'escalated', 'follow-up', 'new-user'], k=random.randint(0, 2))
-        
-        # Add geographic data
-        regions = ['North America', 'Europe', 'Asia', 'South America', 'Africa', 'Oceania']
-        region = random.choice(regions)
-        
-        # Add user satisfaction score
-        satisfaction = None
-        if random.random() < 0.7:  # 70% chance of having a satisfaction score
-            satisfaction = random.randint(1, 5)
-        
-        # Add resolution status
-        resolution_statuses = ['resolved', 'pending', 'escalated', 'closed', 'reopened']
-        resolution_status = random.choice(resolution_statuses)
-        
-        # Add first-time user flag
-        first_time_user = random.random() < 0.3  # 30% chance of being a first-time user
-        
-        # Add response quality score (from AI evaluation)
-        response_quality = round(random.uniform(0.5, 1.0), 2)
-        
-        data.append({
-            "conversation_id": conv_id,
-            "user_id": user_id,
-            "user_message": user_message,
-            "chatbot_reply": chatbot_reply,
-            "response_time": response_time,
-            "timestamp": timestamp,
-            "sentiment_label": sentiment_label,
-            "sentiment_score": sentiment_score,
-            "drop_off": drop_off,
-            "message_length": len(user_message),
-            "intent": intent,
-            "tags": ','.join(tags) if tags else '',
-            "region": region,
-            "topic": topic,
-            "topic_image": topic_images[topic],
-            "user_avatar": profile['avatar'],
-            "satisfaction": satisfaction,
-            "resolution_status": resolution_status,
-            "first_time_user": first_time_user,
-            "response_quality": response_quality
+            raise ValueError(f"Unknown aggregate function: {fn}")
+        data = pd.read_sql_query(sql, self.conn, params=args).to_dict('records')
+        return _StandInResponse(data)
+
+class _StandInResponse:
+    """Mimics the postgrest request builder so stand-in results are read with .execute().data"""
+    def __init__(self, data):
+        self.data = data
+
+    def execute(self):
+        return self
+
+def _aggregate_params(filters) -> dict:
+    """RPC parameters for the aggregate functions; unset filters are passed as null"""
+    cutoff = filter_cutoff(filters)
+    selections = dict(filters[1])
+    params = {'since': cutoff.isoformat() if cutoff is not None else None}
+    for col in FILTER_COLUMNS:
+        params[f"{col}_in"] = list(selections[col]) if col in selections else None
+    return params
+
+def _run_aggregate_queries(backend, filters) -> dict:
+    """Run the KPI and daily-count functions against Supabase or the stand-in"""
+    params = _aggregate_params(filters)
+    kpis = execute_with_retry(backend.rpc('chat_log_kpis', params)).data[0]
+    daily = pd.DataFrame(
+        execute_with_retry(backend.rpc('chat_log_daily_counts', params)).data,
+        columns=['day', 'message_count']
+    )
+    return {
+        'kpis': kpis,
+        'daily_counts': _complete_daily_counts(
+            pd.to_datetime(daily['day']), daily['message_count']
+        ),
+    }
+
+def _complete_daily_counts(days: pd.Series, counts: pd.Series) -> pd.DataFrame:
+    """Daily counts with empty days filled in, as the chart expects"""
+    series = pd.Series(counts.values, index=days.values)
+    if not series.empty:
+        series = series.reindex(pd.date_range(series.index.min(), series.index.max(), freq='D'), fill_value=0)
+    return series.rename_axis('Date').reset_index(name='Message Count')
+
+@st.cache_data(ttl=CHAT_LOGS_TTL)
+def fetch_chat_log_aggregates(filters) -> dict:
+    """
+    KPI values and daily message counts computed in Postgres.
+    Returns None if the aggregate functions cannot be reached.
+    """
+    try:
+        return _run_aggregate_queries(get_supabase_client(), filters)
+    except Exception as e:
+        st.error(f"Error fetching aggregates: {e}")
+        return None
+
+@st.cache_data(ttl=CHAT_LOGS_TTL)
+def fetch_chat_log_filter_options(period) -> dict:
+    """
+    Sorted values of each filter column within a time period, found in
+    Postgres so aggregate mode can show the filters without loading rows.
+    Returns None if the function cannot be reached.
+    """
+    try:
+        since = filter_cutoff(period)
+        params = {'since': since.isoformat() if since is not None else None}
+        data = execute_with_retry(get_supabase_client().rpc('chat_log_filter_options', params)).data
+    except Exception as e:
+        st.error(f"Error fetching filter options: {e}")
+        return None
+    options = {col: [] for col in FILTER_COLUMNS}
+    for row in data:
+        options[row['filter_column']].append(row['value'])
+    return {col: sorted(values) for col, values in options.items()}
+
+def compute_local_aggregates(df: pd.DataFrame, filters) -> dict:
+    """Aggregate-mode results for data that did not come through Supabase"""
+    return _run_aggregate_queries(SqliteAggregateStandIn(df), filters)
+
+@dataclass(frozen=True)
+class ChatLogStats:
+    """Statistics the KPI cards and analysis tabs read, computed together from raw rows"""
+    total_messages: int
+    unique_users: int
+    avg_response_time: float
+    positive_ratio: float
+    drop_off_rate: float
+    sentiment_counts: pd.Series  # Messages per sentiment label, most common first
+    response_time_summary: dict  # mean, median, p90 and max
+    response_time_histogram: pd.DataFrame  # bin_start, bin_end, count
+    user_metrics: pd.DataFrame  # Per-user means, drop-off % and message count
+    user_radar: pd.DataFrame  # Per-user RADAR_METRICS scores, 1 being the best
+
+    def kpis(self) -> dict:
+        """KPI values in the shape aggregate mode returns them"""
+        return {
+            'total_messages': self.total_messages,
+            'unique_users': self.unique_users,
+            'avg_response_time': self.avg_response_time,
+            'positive_ratio': self.positive_ratio,
+            'drop_off_rate': self.drop_off_rate,
+        }
+
+# Measures averaged per user in ChatLogStats.user_metrics
+STATS_MEASURES = ['sentiment_score', 'response_time', 'message_length']
+
+def compute_chat_log_stats(df: pd.DataFrame) -> ChatLogStats:
+    """
+    Compute every ChatLogStats field from one set of column arrays. Sums
+    and per-user totals come from column sums and bincounts rather than a
+    separate pandas scan per statistic.
+    """
+    n = len(df)
+    X = np.column_stack([
+        df[col].to_numpy(dtype=np.float64, na_value=np.nan) if col in df.columns else np.full(n, np.nan)
+        for col in STATS_MEASURES
+    ]) if n else np.empty((0, len(STATS_MEASURES)))
+    present = ~np.isnan(X)
+    Xz = np.where(present, X, 0.0)
+    P = present.astype(np.float64)
+    measure_n = present.sum(axis=0)
+    measure_sum = Xz.sum(axis=0)
+    
+    rt_index = STATS_MEASURES.index('response_time')
+    response_times = X[present[:, rt_index], rt_index]
+    
+    drop_off = df['drop_off'].to_numpy(dtype=bool, na_value=False) if 'drop_off' in df.columns else np.zeros(n, dtype=bool)
+    
+    if 'sentiment_label' in df.columns:
+        sentiment_counts = df['sentiment_label'].value_counts()
+        sentiment_counts = sentiment_counts[sentiment_counts > 0]
+    else:
+        sentiment_counts = pd.Series(dtype='int64')
+    
+    # Per-user totals by category code
+    user_metrics = pd.DataFrame(columns=[
+        'User ID', 'Avg Response Time', 'Avg Sentiment', 'Avg Message Length', 'Drop-off %', 'Message Count'
+    ])
+    unique_users = 0
+    if 'user_id' in df.columns and n:
+        users = df['user_id'].astype('category')
+        codes = users.cat.codes.to_numpy()
+        known = codes >= 0
+        codes = codes[known]
+        size = len(users.cat.categories)
+        rows = np.bincount(codes, minlength=size)
+        def user_mean(col):
+            i = STATS_MEASURES.index(col)
+            total = np.bincount(codes, weights=Xz[known, i], minlength=size)
+            count = np.bincount(codes, weights=P[known, i], minlength=size)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return total / count
+        messages = rows
+        if 'conversation_id' in df.columns:
+            messages = np.bincount(codes, weights=df['conversation_id'].notna().to_numpy()[known], minlength=size)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drop_off_pct = np.bincount(codes, weights=drop_off[known], minlength=size) / rows * 100
+        observed = rows > 0
+        unique_users = int(observed.sum())
+        user_metrics = pd.DataFrame({
+            'User ID': users.cat.categories[observed],
+            'Avg Response Time': user_mean('response_time')[observed],
+            'Avg Sentiment': user_mean('sentiment_score')[observed],
+            'Avg Message Length': user_mean('message_length')[observed],
+            'Drop-off %': drop_off_pct[observed],
+            'Message Count': messages[observed].astype(np.int64),
         })
     
-    return pd.DataFrame(data)
+    if len(response_times):
+        counts, edges = np.histogram(response_times, bins=20)
+        median, p90 = np.quantile(response_times, [0.5, 0.9])
+        response_time_summary = {
+            'mean': measure_sum[rt_index] / measure_n[rt_index],
+            'median': median,
+            'p90': p90,
+            'max': response_times.max(),
+        }
+    else:
+        counts, edges = np.zeros(0, dtype=np.int64), np.zeros(1)
+        response_time_summary = dict.fromkeys(['mean', 'median', 'p90', 'max'], np.nan)
+    
+    return ChatLogStats(
+        total_messages=n,
+        unique_users=unique_users,
+        avg_response_time=response_time_summary['mean'] if n else None,
+        positive_ratio=sentiment_counts.get('positive', 0) / n if n else None,
+        drop_off_rate=drop_off.mean() if n else None,
+        sentiment_counts=sentiment_counts,
+        response_time_summary=response_time_summary,
+        response_time_histogram=pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'count': counts}),
+        user_metrics=user_metrics,
+        user_radar=compute_user_radar(user_metrics),
+    )
+
+def compute_volume_counts(series: pd.DataFrame) -> pd.DataFrame:
+    """Message counts per bucket of a TimeRollups series, in the shape of the daily counts"""
+    return pd.DataFrame({'Date': series['time'], 'Message Count': series['count']})
+
+def create_daily_volume_chart(daily_counts: pd.DataFrame):
+    """Altair line chart of message volume per day, or per time bucket"""
+    return alt.Chart(daily_counts).mark_line(
+        point=True,
+        interpolate='basis'
+    ).encode(
+        x=alt.X('Date:T', title='Date'),
+        y=alt.Y('Message Count:Q', title='Message Count'),
+        tooltip=['Date:T', 'Message Count:Q']
+    ).properties(
+        height=300
+    ).interactive()
 
 # -----------------------------
 # DATA PROCESSING FUNCTIONS
 # -----------------------------
-@st.cache_data
-def generate_word_cloud(text_series):
-    """Generate a word cloud from a series of text"""
-    all_text = ' '.join(text_series.astype(str))
-    # Remove common words and punctuation
-    all_text = re.sub(r'[^\w\s]', '', all_text.lower())
-    stop_words = set(['the', 'and', 'to', 'of', 'a', 'in', 'for', 'is', 'on', 'that', 'by', 'this', 'with', 'i', 'you', 'it', 'not', 'or', 'be', 'are', 'from', 'at', 'as', 'your', 'have', 'topic', 'lorem', 'ipsum'])
-    word_list = [word for word in all_text.split() if word not in stop_words and len(word) > 2]
-    word_freq = Counter(word_list)
-    
+def generate_word_cloud(word_freq):
+    """
+    PNG image of a word cloud of the term frequencies of a TermFrequencies
+    store, or None without any terms. Images are shared across sessions and
+    reused while the frequencies keep the same fingerprint.
+    """
+    if not word_freq:
+        return None
+    return get_word_cloud_cache().image(word_freq)
+
+def word_cloud_fingerprint(word_freq) -> tuple:
+    """
+    Words with their counts rounded to WORD_CLOUD_PRECISION steps of the top
+    count, so changes too small to alter the image keep the fingerprint
+    """
+    top = max(word_freq.values())
+    return tuple(sorted((word, round(count * WORD_CLOUD_PRECISION / top)) for word, count in word_freq.items()))
+
+class WordCloudCache:
+    """Rendered word cloud PNGs keyed by frequency fingerprint, least recently used evicted first"""
+    def __init__(self, size=WORD_CLOUD_CACHE_SIZE):
+        self.size = size
+        self.images = OrderedDict()
+        self.lock = threading.Lock()
+
+    def image(self, word_freq) -> bytes:
+        key = word_cloud_fingerprint(word_freq)
+        with self.lock:
+            if key in self.images:
+                self.images.move_to_end(key)
+                return self.images[key]
+        # Rendered outside the lock; a race at worst renders the same image twice
+        png = _render_word_cloud(word_freq)
+        with self.lock:
+            self.images[key] = png
+            if len(self.images) > self.size:
+                self.images.popitem(last=False)
+        return png
+
+@st.cache_resource
+def get_word_cloud_cache() -> WordCloudCache:
+    """Word cloud images shared by every session"""
+    return WordCloudCache()
+
+def _render_word_cloud(word_freq) -> bytes:
     # Generate word cloud
-    wc = WordCloud(width=800, height=400, background_color='black', colormap='viridis', max_words=100)
-    if word_freq:
-        wc.generate_from_frequencies(word_freq)
-        return wc
-    return None
+    wc = WordCloud(width=800, height=400, background_color='black', colormap='viridis', max_words=WORD_CLOUD_MAX_WORDS)
+    wc.generate_from_frequencies(word_freq)
+    buffer = BytesIO()
+    wc.to_image().save(buffer, format='PNG')
+    return buffer.getvalue()
+
+class NetworkLayout:
+    """
+    Spring layout positions for one filter set's user-topic graph. Layouts
+    are cached per graph; a graph that changed starts from the previous
+    positions and runs a capped number of iterations, so nodes keep their
+    places across refreshes.
+    """
+    def __init__(self):
+        self.layouts = {}
+        self.pos = None
+        self.lock = threading.Lock()
+
+    def positions(self, G) -> dict:
+        """Positions of every node in the graph"""
+        signature = (tuple(G.nodes()), tuple(G.edges(data='weight')))
+        with self.lock:
+            if signature in self.layouts:
+                self.pos = self.layouts[signature]
+                return self.pos
+            start = {node: self.pos[node] for node in G if node in self.pos} if self.pos is not None else {}
+            if start:
+                # Nodes new to the graph are placed at random among the others
+                pos = nx.spring_layout(G, pos=start, iterations=NETWORK_WARM_ITERATIONS, seed=42)
+            else:
+                pos = nx.spring_layout(G, iterations=NETWORK_LAYOUT_ITERATIONS, seed=42)
+            if len(self.layouts) >= NETWORK_LAYOUT_CACHE_SIZE:
+                self.layouts.pop(next(iter(self.layouts)))
+            self.layouts[signature] = self.pos = pos
+            return pos
+
+@st.cache_resource(max_entries=16)
+def get_network_layout(layout_key) -> NetworkLayout:
+    """Shared layout state for the user-topic graphs of one filter set"""
+    return NetworkLayout()
+
+def compute_user_radar(user_metrics):
+    """
+    Radar scores of every user in ChatLogStats.user_metrics: each metric is
+    min-max scaled across all users at once and flipped where lower values
+    are better, so 1 is always the best user. Indexed by user ID.
+    """
+    if user_metrics.empty:
+        return pd.DataFrame(columns=list(RADAR_METRICS))
+    values = user_metrics[[col for col, _ in RADAR_METRICS.values()]].to_numpy(dtype=np.float64)
+    low = np.nanmin(values, axis=0)
+    span = np.nanmax(values, axis=0) - low
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Metrics all users share sit in the middle
+        scores = np.where(span > 0, (values - low) / span, 0.5)
+    higher_is_better = np.array([better for _, better in RADAR_METRICS.values()])
+    scores = np.where(higher_is_better, scores, 1 - scores)
+    return pd.DataFrame(scores, index=user_metrics['User ID'].to_numpy(), columns=list(RADAR_METRICS))
 
 @st.cache_data
-def create_conversation_network(df):
-    """Create a network graph of conversations"""
-    if df.empty:
-        return None, None
-    
+def build_conversation_graph(df):
+    """User-topic graph of the rows, with edges weighted by how often a user raised a topic"""
     G = nx.DiGraph()
     
     # Add nodes for users and topics
     users = df['user_id'].unique()
     topics = df['topic'].unique() if 'topic' in df.columns else []
     
-    for user in users:
-        G.add_node(user, type='user')
+    G.add_nodes_from(users, type='user')
+    G.add_nodes_from(topics, type='topic')
     
-    for topic in topics:
-        G.add_node(topic, type='topic')
+    # Add edges between users and topics, weighted by one grouped count
+    if 'topic' in df.columns:
+        edge_counts = df.groupby(['user_id', 'topic'], observed=True).size()
+        G.add_weighted_edges_from(
+            (user, topic, int(count)) for (user, topic), count in edge_counts.items()
+        )
+    return G
+
+def create_conversation_network(df, layout_key=None):
+    """
+    Create a network graph of conversations, with node positions from the
+    layout kept for `layout_key`. Also returns the seconds the layout took,
+    since it dominates the cost for large graphs. Only the graph build is
+    cached; the layout runs on every call so the shared layout state stays
+    current and the timing is measured, not replayed.
+    """
+    if df.empty:
+        return None, None, None
     
-    # Add edges between users and topics
-    for user in users:
-        user_topics = df[df['user_id'] == user]['topic'].value_counts()
-        for topic, count in user_topics.items():
-            G.add_edge(user, topic, weight=count)
+    G = build_conversation_graph(df)
     
-    # Calculate positions using a spring layout
-    pos = nx.spring_layout(G, seed=42)
+    # Calculate positions using a spring layout, reused or warm-started when possible
+    layout_start = time.perf_counter()
+    pos = get_network_layout(layout_key).positions(G)
+    layout_seconds = time.perf_counter() - layout_start
     
     # Create edge and node data for visualization
-    edge_data = []
-    for edge in G.edges(data=True):
-        source_idx = list(G.nodes()).index(edge[0])
-        target_idx = list(G.nodes()).index(edge[1])
-        edge_data.append({
-            'source': source_idx,
-            'target': target_idx,
-            'weight': edge[2].get('weight', 1)
-        })
+    node_index = {node: i for i, node in enumerate(G.nodes())}
+    edge_data = [
+        {'source': node_index[source], 'target': node_index[target], 'weight': weight}
+        for source, target, weight in G.edges(data='weight', default=1)
+    ]
     
-    node_data = []
-    for node in G.nodes(data=True):
-        node_data.append({
-            'name': node[0],
-            'type': node[1]['type']
-        })
+    node_data = [
+        {'name': node, 'type': node_type, 'x': float(pos[node][0]), 'y': float(pos[node][1])}
+        for node, node_type in G.nodes(data='type')
+    ]
     
-    return edge_data, node_data
+    return edge_data, node_data, layout_seconds
+
+def server_timezone():
+    """
+    IANA zone of the server's local time, named by TZ or the /etc/localtime
+    link, so DST changes are followed. Falls back to the current UTC offset
+    if neither names a known zone.
+    """
+    names = [os.environ.get('TZ', '').lstrip(':')]
+    if os.path.islink('/etc/localtime'):
+        names.append(os.path.realpath('/etc/localtime').partition('zoneinfo/')[2])
+    for name in names:
+        if name in DISPLAY_TIMEZONES:
+            return ZoneInfo(name)
+    return datetime.now().astimezone().tzinfo
 
 @st.cache_data
-def create_heatmap(df):
-    """Create a heatmap of chat activity by hour and day"""
-    if df.empty:
+def create_heatmap(hourly, tz=None):
+    """
+    Create a heatmap of chat activity by hour and day from message counts
+    per time bucket, such as rollup cube hours or timeline minutes. With a
+    timezone the hours are read in it; naive timestamps are taken to be in
+    the server's local time.
+    """
+    if hourly.empty:
         return None
     
-    # Extract hour and day of week
-    df = df.copy()
-    df['hour'] = df['timestamp'].dt.hour
-    df['day_of_week'] = df['timestamp'].dt.day_name()
-    
-    # Order days of week
-    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    
-    # Create pivot table
-    heatmap_data = pd.pivot_table(
-        df, 
-        values='conversation_id', 
-        index='day_of_week',
-        columns='hour',
-        aggfunc='count',
-        fill_value=0
-    )
+    times = hourly['time']
+    if tz is not None:
+        if times.dt.tz is None:
+            # Naive hours are wall-clock hours, so the hour clocks skip is moved
+            # forward and the one they repeat is read as its first occurrence
+            times = times.dt.tz_localize(
+                server_timezone(), ambiguous=np.ones(len(times), dtype=bool), nonexistent='shift_forward'
+            )
+        times = times.dt.tz_convert(tz)
     
-    # Reorder days
-    heatmap_data = heatmap_data.reindex(day_order)
+    # Count into a 7 x 24 grid by integer weekday and hour codes
+    cells = times.dt.weekday.to_numpy() * 24 + times.dt.hour.to_numpy()
+    counts = np.bincount(cells, weights=hourly['count'].to_numpy(), minlength=7 * 24)
     
     # Convert to format for Altair
-    heatmap_df = heatmap_data.reset_index().melt(
-        id_vars='day_of_week', 
-        var_name='hour', 
-        value_name='count'
-    )
+    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    heatmap_df = pd.DataFrame({
+        'day_of_week': np.repeat(day_order, 24),
+        'hour': np.tile(np.arange(24), 7),
+        'count': counts.astype(np.int64),
+    })
     
     return heatmap_df
 
 @st.cache_data
-def create_user_journey_sankey(df):
-    """Create a Sankey diagram data of user journeys through intents and sentiments"""
-    if df.empty or 'intent' not in df.columns:
-        return None
-    
-    # Create source-target pairs for Sankey diagram
-    sources = []
-    targets = []
-    values = []
-    labels = []
-    
-    # Add users to intents
-    user_intent_counts = df.groupby(['user_id', 'intent']).size().reset_index(name='count')
-    
-    # Create a mapping of labels to indices
-    all_users = df['user_id'].unique()
-    all_intents = df['intent'].unique()
-    all_sentiments = df['sentiment_label'].unique()
-    
-    # Create label list
-    labels = list(all_users) + list(all_intents) + list(all_sentiments)
+def create_user_journey_sankey(frame, stages, weight=None, top_n=JOURNEY_TOP_N):
+    """
+    Create Sankey diagram data of journeys through an ordered list of stage
+    columns, with one set of links per pair of adjacent stages. Each stage
+    keeps its top_n values by volume and folds the rest into JOURNEY_OTHER.
+    Rows count once each, or by their `weight` column for pre-aggregated
+    totals such as the rollup cube's.
+    """
+    stages = [col for col in stages if col in frame.columns]
+    if frame.empty or len(stages) < 2:
+        return None, None
     
-    # Map labels to indices
-    label_to_idx = {label: i for i, label in enumerate(labels)}
+    weights = frame[weight].to_numpy(dtype=np.float64) if weight else np.ones(len(frame))
     
-    # User to intent flows
-    for _, row in user_intent_counts.iterrows():
-        sources.append(label_to_idx[row['user_id']])
-        targets.append(label_to_idx[row['intent']])
-        values.append(row['count'])
+    # Node codes per stage, offset so every stage gets its own range of nodes
+    stage_codes = []
+    labels = []
+    for col in stages:
+        values = frame[col].astype('category')
+        codes = values.cat.codes.to_numpy()
+        known = codes >= 0
+        totals = np.bincount(codes[known], weights=weights[known], minlength=len(values.cat.categories))
+        keep = np.argsort(-totals, kind='stable')[:top_n]
+        keep = keep[totals[keep] > 0]
+        # Kept values become 0..len(keep)-1, the rest len(keep), missing stays -1
+        remap = np.full(len(totals) + 1, len(keep))
+        remap[keep] = np.arange(len(keep))
+        remap[-1] = -1
+        codes = remap[codes]
+        stage_labels = list(values.cat.categories[keep])
+        if (codes == len(keep)).any():
+            stage_labels.append(JOURNEY_OTHER)
+        stage_codes.append(np.where(codes >= 0, codes + len(labels), -1))
+        labels += stage_labels
     
-    # Intent to sentiment flows
-    intent_sentiment_counts = df.groupby(['intent', 'sentiment_label']).size().reset_index(name='count')
-    for _, row in intent_sentiment_counts.iterrows():
-        sources.append(label_to_idx[row['intent']])
-        targets.append(label_to_idx[row['sentiment_label']])
-        values.append(row['count'])
+    # Count each pair of adjacent stages' nodes with one bincount
+    links = []
+    for i in range(len(stages) - 1):
+        source, target = stage_codes[i], stage_codes[i + 1]
+        known = (source >= 0) & (target >= 0)
+        pairs, inverse = np.unique(source[known] * len(labels) + target[known], return_inverse=True)
+        links.append(pd.DataFrame({
+            'source': pairs // len(labels),
+            'target': pairs % len(labels),
+            'value': np.rint(np.bincount(inverse, weights=weights[known], minlength=len(pairs))).astype(np.int64),
+            'source_stage': stages[i],
+            'target_stage': stages[i + 1],
+        }))
     
     # Create Sankey data
-    sankey_data = pd.DataFrame({
-        'source': sources,
-        'target': targets,
-        'value': values,
-        'source_label': [labels[s] for s in sources],
-        'target_label': [labels[t] for t in targets]
-    })
+    sankey_data = pd.concat(links, ignore_index=True)
+    node_labels = np.asarray(labels, dtype=object)
+    sankey_data['source_label'] = node_labels[sankey_data['source'].to_numpy()]
+    sankey_data['target_label'] = node_labels[sankey_data['target'].to_numpy()]
     
     return sankey_data, labels
 
@@ -1107,6 +3304,39 @@ def fetch_unsplash_images(query, count=1):
         st.error(f"Error fetching images: {e}")
         return ["https://images.unsplash.com/photo-1568667256549-094345857637?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80"] * count
 
+def render_aggregate_tabs(tabs, aggregates):
+    """Tab contents for aggregate mode before raw chat logs are loaded"""
+    with tabs[0]:
+        st.markdown("#### Message Volume Over Time")
+        with chart_container(aggregates['daily_counts']):
+            st.altair_chart(create_daily_volume_chart(aggregates['daily_counts']), use_container_width=True)
+    
+    for tab in tabs[1:4]:
+        with tab:
+            st.info("These visualizations need raw chat logs. Load them from the Chat Explorer tab.")
+    
+    with tabs[4]:
+        st.subheader("Chat Data Explorer")
+        st.caption("Aggregate mode is on, so raw chat logs have not been loaded yet.")
+        if st.button("Load Chat Logs", type="primary"):
+            st.session_state.raw_rows_requested = True
+            st.experimental_rerun()
+
+def render_footer():
+    """Dashboard footer, closing the dark mode wrapper if enabled"""
+    st.markdown("""
+    <div style="background-color: rgba(28, 131, 225, 0.1); padding: 15px; border-radius: 5px; margin-top: 20px; text-align: center;">
+        <p style="margin: 0; color: #666;">
+            <b>Premium Chat Analytics Dashboard</b> | Auto-refreshes every {st.session_state.refresh_interval} seconds | 
+            Data timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Close dark mode div if enabled
+    if st.session_state.dark_mode:
+        st.markdown('</div>', unsafe_allow_html=True)
+
 # -----------------------------
 # MAIN APPLICATION
 # -----------------------------
@@ -1131,10 +3361,55 @@ def main():
     if 'selected_tab' not in st.session_state:
         st.session_state.selected_tab = 0
     
+    if 'aggregate_mode' not in st.session_state:
+        st.session_state.aggregate_mode = False
+    
+    if 'raw_rows_requested' not in st.session_state:
+        st.session_state.raw_rows_requested = False
+    
+    if 'explorer_details' not in st.session_state:
+        st.session_state.explorer_details = False
+    
+    if 'push_updates' not in st.session_state:
+        st.session_state.push_updates = False
+    
+    if 'timezone' not in st.session_state:
+        st.session_state.timezone = None
+    
     # Toggle dark mode
     if st.session_state.dark_mode:
         st.markdown('<div class="dark-mode">', unsafe_allow_html=True)
     
+    # Fall back to generated demo data when Supabase has no chat logs. With push
+    # updates on, inserts stream in from Supabase Realtime or a local stand-in
+    demo = not chat_logs_available()
+    if st.session_state.push_updates:
+        feed = get_change_feed('local' if demo else 'realtime')
+    else:
+        feed = None
+    # Taken before any data is read, so nothing published after it is missed
+    feed_seq = feed.seq if feed is not None else None
+    
+    # Filter selections, replaced by the sidebar widgets when filters are shown
+    time_period = "All Time"
+    selections = {}
+    
+    # Aggregate mode reads no rows until raw rows are asked for; the sidebar
+    # options come from Postgres, or else from a store of just the filter columns
+    narrow = (
+        not demo and st.session_state.aggregate_mode and not CHAT_LOGS_DATASET
+        and not st.session_state.raw_rows_requested
+    )
+    def load_store(time_period, columns=None):
+        """Store for a time period, which the sidebar options are read from too"""
+        period = make_filter_set(time_period)
+        if demo:
+            return load_demo_store(period, feed)
+        return load_chat_log_store(columns, period, feed)
+    
+    # Loaded once its time period is known, and only if options or rows are read from it
+    store = None
+    
     # Sidebar
     with st.sidebar:
         st.markdown(f"""
@@ -1150,14 +3425,45 @@ def main():
             st.session_state.dark_mode = dark_mode
             st.experimental_rerun()
         
+        # Aggregate mode toggle
+        aggregate_mode = st.toggle(
+            "Aggregate Mode",
+            value=st.session_state.aggregate_mode,
+            help="Compute KPIs and daily volume in Postgres and only load raw chat logs for the Chat Explorer"
+        )
+        if aggregate_mode != st.session_state.aggregate_mode:
+            st.session_state.aggregate_mode = aggregate_mode
+            st.session_state.raw_rows_requested = False
+            st.experimental_rerun()
+        
+        # Timezone activity hours are shown in
+        timezones = [None] + DISPLAY_TIMEZONES
+        st.session_state.timezone = st.selectbox(
+            "Timezone",
+            timezones,
+            index=timezones.index(st.session_state.timezone),
+            format_func=lambda tz: "Data timezone" if tz is None else tz,
+            help="Timezone the activity heatmap reads hours of day in"
+        )
+        
         # Auto-refresh settings
         st.markdown("### Auto-Refresh Settings")
+        push_updates = st.toggle(
+            "Live Updates",
+            value=st.session_state.push_updates,
+            help="Rerun only when new chats are pushed, instead of polling every refresh interval"
+        )
+        if push_updates != st.session_state.push_updates:
+            st.session_state.push_updates = push_updates
+            st.experimental_rerun()
+        
         refresh_interval = st.slider(
             "Refresh interval (seconds)", 
             min_value=1, 
             max_value=60, 
             value=st.session_state.refresh_interval,
-            step=1
+            step=1,
+            disabled=st.session_state.push_updates
         )
         
         if refresh_interval != st.session_state.refresh_interval:
@@ -1184,30 +3490,38 @@ def main():
             st.markdown(f"{icons['calendar']} **Time Period**")
             time_period = st.selectbox(
                 "Select time period",
-                ["Last 24 Hours", "Last 7 Days", "Last 30 Days", "All Time"],
+                list(TIME_PERIODS),
                 index=3,
                 label_visibility="collapsed"
             )
+            # Options are the filter index vocabularies of the rows the dashboard
+            # reads; until those are needed, aggregate mode asks Postgres instead
+            filter_options = None
+            if narrow:
+                filter_options = fetch_chat_log_filter_options(make_filter_set(time_period))
+            if filter_options is None:
+                store = load_store(time_period, required_columns(['filters']) if narrow else None)
+                filter_options = store.read(ChatLogStore.filter_options)
             
             # User filter
             st.markdown(f"{icons['user']} **Users**")
-            # This will be populated after data is loaded
+            selections['user_id'] = st.multiselect("Select users", filter_options['user_id'], label_visibility="collapsed")
             
             # Sentiment filter
             st.markdown(f"{icons['sentiment_positive']} **Sentiment**")
-            # This will be populated after data is loaded
+            selections['sentiment_label'] = st.multiselect("Select sentiments", filter_options['sentiment_label'], label_visibility="collapsed")
             
             # Topic filter
             st.markdown(f"{icons['topic']} **Topics**")
-            # This will be populated after data is loaded
+            selections['topic'] = st.multiselect("Select topics", filter_options['topic'], label_visibility="collapsed")
             
             # Intent filter
             st.markdown(f"{icons['intent']} **Intents**")
-            # This will be populated after data is loaded
+            selections['intent'] = st.multiselect("Select intents", filter_options['intent'], label_visibility="collapsed")
             
             # Region filter
             st.markdown(f"{icons['region']} **Regions**")
-            # This will be populated after data is loaded
+            selections['region'] = st.multiselect("Select regions", filter_options['region'], label_visibility="collapsed")
         
         # Display last refresh time
         st.markdown(f"""
@@ -1235,62 +3549,52 @@ def main():
     current_time = datetime.now()
     time_diff = (current_time - st.session_state.last_refresh).total_seconds()
     
-    if time_diff >= st.session_state.refresh_interval:
+    if (feed is None or not push_reruns_supported()) and time_diff >= st.session_state.refresh_interval:
         st.session_state.last_refresh = current_time
         st.experimental_rerun()
     
-    # Fetch data
+    # Fetch data for the sidebar time period, narrowed to the selections by the filter index
+    filters = make_filter_set(time_period, selections)
+    period = make_filter_set(time_period)
     with st.spinner("Loading chat data..."):
-        df = fetch_chat_logs()
-        if df.empty:
+        if demo:
             st.info("No chat logs found in Supabase. Generating random data for demo purposes.")
-            df = generate_random_data(100)
-    
-    # Apply time period filter
-    if 'time_period' in locals():
-        if time_period != "All Time":
-            days = {"Last 24 Hours": 1, "Last 7 Days": 7, "Last 30 Days": 30}
-            cutoff_date = datetime.now() - timedelta(days=days[time_period])
-            df = df[df['timestamp'] >= cutoff_date]
-    
-    # Populate sidebar filters with actual data
-    if st.session_state.show_filters and 'df' in locals():
-        with st.sidebar:
-            # User filter
-            unique_users = sorted(df['user_id'].unique().tolist()) if 'user_id' in df.columns else []
-            selected_users = st.multiselect("Select users", unique_users, label_visibility="collapsed")
-            
-            # Sentiment filter
-            unique_sentiments = sorted(df['sentiment_label'].unique().tolist()) if 'sentiment_label' in df.columns else []
-            selected_sentiments = st.multiselect("Select sentiments", unique_sentiments, label_visibility="collapsed")
-            
-            # Topic filter
-            unique_topics = sorted(df['topic'].unique().tolist()) if 'topic' in df.columns else []
-            selected_topics = st.multiselect("Select topics", unique_topics, label_visibility="collapsed")
-            
-            # Intent filter
-            unique_intents = sorted(df['intent'].unique().tolist()) if 'intent' in df.columns else []
-            selected_intents = st.multiselect("Select intents", unique_intents, label_visibility="collapsed")
-            
-            # Region filter
-            unique_regions = sorted(df['region'].unique().tolist()) if 'region' in df.columns else []
-            selected_regions = st.multiselect("Select regions", unique_regions, label_visibility="collapsed")
-            
-            # Apply filters
-            if selected_users:
-                df = df[df['user_id'].isin(selected_users)]
-            
-            if selected_sentiments:
-                df = df[df['sentiment_label'].isin(selected_sentiments)]
-            
-            if selected_topics:
-                df = df[df['topic'].isin(selected_topics)]
-            
-            if selected_intents:
-                df = df[df['intent'].isin(selected_intents)]
-            
-            if selected_regions:
-                df = df[df['region'].isin(selected_regions)]
+        
+        # In aggregate mode KPIs and daily volume come from Postgres (or the local stand-in)
+        aggregates = None
+        if st.session_state.aggregate_mode:
+            if demo:
+                if store is None:
+                    store = load_store(time_period)
+                aggregates = compute_local_aggregates(store.read(ChatLogStore.select, ()), filters)
+            elif not CHAT_LOGS_DATASET:
+                # A Parquet dataset has no Postgres functions, so its KPIs come from the rows
+                aggregates = fetch_chat_log_aggregates(filters)
+        
+        # Raw rows are only loaded in aggregate mode once the Chat Explorer asks for them
+        df = None
+        if aggregates is None or st.session_state.raw_rows_requested:
+            if store is None or narrow:
+                # A store narrowed to the filter columns for the options lacks the
+                # columns the KPIs need once the aggregates could not be fetched
+                store = load_store(time_period)
+            df = store.read(ChatLogStore.select, filters[1])
+        
+        def read(method, *args):
+            """Read the rows matching the dimension selections from the store"""
+            return store.read(method, filters[1], *args)
+        
+        # KPI cards, the analysis tabs and the rollup-backed charts all read
+        # from structures the store keeps in step with its rows
+        if df is not None:
+            stats = read(ChatLogStore.stats)
+            correlation_matrix = read(ChatLogStore.correlation)
+            resolution, time_series = read(ChatLogStore.time_series, TIME_PERIODS[time_period])
+        
+        def rollup(by):
+            return read(ChatLogStore.rollup, by)
+    
+    kpis = aggregates['kpis'] if aggregates is not None else stats.kpis()
     
     # Key metrics
     st.markdown("### Key Performance Indicators")
@@ -1307,8 +3611,8 @@ def main():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_messages = len(df)
-        unique_users = df['user_id'].nunique() if 'user_id' in df.columns else 0
+        total_messages = kpis['total_messages']
+        unique_users = kpis['unique_users']
         
         st.markdown(f"""
         <div class="metric-card">
@@ -1327,7 +3631,7 @@ def main():
         """, unsafe_allow_html=True)
     
     with col2:
-        avg_response = f"{df['response_time'].mean():.2f}" if not df.empty else "N/A"
+        avg_response = f"{kpis['avg_response_time']:.2f}" if kpis['total_messages'] else "N/A"
         target_response = 1.0
         response_status = "✅" if float(avg_response) < target_response else "⚠️"
         
@@ -1348,7 +3652,7 @@ def main():
         """, unsafe_allow_html=True)
     
     with col3:
-        positive_ratio = f"{(df['sentiment_label'] == 'positive').mean() * 100:.1f}%" if not df.empty else "N/A"
+        positive_ratio = f"{kpis['positive_ratio'] * 100:.1f}%" if kpis['total_messages'] else "N/A"
         target_positive = 60
         sentiment_status = "✅" if float(positive_ratio.replace('%', '')) > target_positive else "⚠️"
         
@@ -1369,7 +3673,7 @@ def main():
         """, unsafe_allow_html=True)
     
     with col4:
-        dropoff_rate = f"{(df['drop_off'] == True).mean() * 100:.1f}%" if not df.empty else "N/A"
+        dropoff_rate = f"{kpis['drop_off_rate'] * 100:.1f}%" if kpis['total_messages'] else "N/A"
         target_dropoff = 10
         dropoff_status = "✅" if float(dropoff_rate.replace('%', '')) < target_dropoff else "⚠️"
         
@@ -1403,6 +3707,14 @@ def main():
     
     tabs = st.tabs(tab_titles)
     
+    # Aggregate mode before raw rows are loaded: only aggregate-backed charts are shown
+    if df is None:
+        render_aggregate_tabs(tabs, aggregates)
+        render_footer()
+        if feed is not None:
+            watch_for_new_chats(feed, filters, feed_seq)
+        return
+    
     # Tab 1: Overview
     with tabs[0]:
         col1, col2 = st.columns(2)
@@ -1412,22 +3724,15 @@ def main():
                 "Message Volume Over Time", 
                 "Displays the trend of message volume over time"
             ):
-                # Resample by day and count messages
+                # Daily message counts, from Postgres in aggregate mode
                 if not df.empty:
-                    daily_counts = df.resample('D', on='timestamp').size().reset_index(name='count')
-                    daily_counts.columns = ['Date', 'Message Count']
+                    if aggregates is not None:
+                        daily_counts = aggregates['daily_counts']
+                    else:
+                        daily_counts = compute_volume_counts(time_series)
                     
                     # Create time series chart with Altair
-                    chart = alt.Chart(daily_counts).mark_line(
-                        point=True,
-                        interpolate='basis'
-                    ).encode(
-                        x=alt.X('Date:T', title='Date'),
-                        y=alt.Y('Message Count:Q', title='Message Count'),
-                        tooltip=['Date:T', 'Message Count:Q']
-                    ).properties(
-                        height=300
-                    ).interactive()
+                    chart = create_daily_volume_chart(daily_counts)
                     
                     st.altair_chart(chart, use_container_width=True)
                 else:
@@ -1439,7 +3744,7 @@ def main():
                 "Shows the distribution of sentiment across all messages"
             ):
                 if not df.empty:
-                    sentiment_counts = df['sentiment_label'].value_counts().reset_index()
+                    sentiment_counts = stats.sentiment_counts.reset_index()
                     sentiment_counts.columns = ['Sentiment', 'Count']
                     
                     # Create pie chart with Altair
@@ -1481,7 +3786,13 @@ def main():
             "Chat Activity Patterns", 
             "Displays chat activity patterns by day of week and hour of day"
         ):
-            heatmap_df = create_heatmap(df)
+            # A selected zone is applied to minute counts, since zones offset by part
+            # of an hour split the cube's hours across two hours of day
+            if st.session_state.timezone is None:
+                activity = rollup(['time'])
+            else:
+                activity = read(ChatLogStore.activity)
+            heatmap_df = create_heatmap(activity, st.session_state.timezone)
             if heatmap_df is not None:
                 # Create heatmap with Altair
                 heatmap = alt.Chart(heatmap_df).mark_rect().encode(
@@ -1503,13 +3814,10 @@ def main():
             "Common Terms in User Messages", 
             "Visualizes frequently used terms in user messages"
         ):
-            wordcloud = generate_word_cloud(df['user_message'])
+            word_freq = read(ChatLogStore.top_terms, WORD_CLOUD_MAX_WORDS)
+            wordcloud = generate_word_cloud(word_freq)
             if wordcloud:
-                # Convert the word cloud to an image
-                fig, ax = plt.subplots(figsize=(10, 5))
-                ax.imshow(wordcloud, interpolation='bilinear')
-                ax.axis('off')
-                st.pyplot(fig)
+                st.image(wordcloud, use_column_width=True)
             else:
                 st.info("Not enough text data for word cloud visualization")
     
@@ -1523,11 +3831,16 @@ def main():
                 "Shows the distribution of response times"
             ):
                 if not df.empty:
-                    # Create histogram with Altair
-                    hist = alt.Chart(df).mark_bar().encode(
-                        alt.X('response_time:Q', bin=alt.Bin(maxbins=20), title='Response Time (seconds)'),
-                        alt.Y('count()', title='Count'),
-                        tooltip=['count()', alt.Tooltip('response_time:Q', title='Response Time')]
+                    # Create histogram with Altair from the pre-binned counts
+                    hist = alt.Chart(stats.response_time_histogram).mark_bar().encode(
+                        alt.X('bin_start:Q', bin='binned', title='Response Time (seconds)'),
+                        alt.X2('bin_end:Q'),
+                        alt.Y('count:Q', title='Count'),
+                        tooltip=[
+                            alt.Tooltip('count:Q', title='Count'),
+                            alt.Tooltip('bin_start:Q', title='From', format='.2f'),
+                            alt.Tooltip('bin_end:Q', title='To', format='.2f')
+                        ]
                     ).properties(
                         height=300
                     )
@@ -1540,16 +3853,16 @@ def main():
                         <h4 style="margin-top: 0;">Response Time Statistics:</h4>
                         <div style="display: grid; grid-template-columns: repeat(2, 1fr); gap: 10px;">
                             <div>
-                                <span style="font-weight: 500;">Mean:</span> {df['response_time'].mean():.2f}s
+                                <span style="font-weight: 500;">Mean:</span> {stats.response_time_summary['mean']:.2f}s
                             </div>
                             <div>
-                                <span style="font-weight: 500;">Median:</span> {df['response_time'].median():.2f}s
+                                <span style="font-weight: 500;">Median:</span> {stats.response_time_summary['median']:.2f}s
                             </div>
                             <div>
-                                <span style="font-weight: 500;">90th Percentile:</span> {df['response_time'].quantile(0.9):.2f}s
+                                <span style="font-weight: 500;">90th Percentile:</span> {stats.response_time_summary['p90']:.2f}s
                             </div>
                             <div>
-                                <span style="font-weight: 500;">Max:</span> {df['response_time'].max():.2f}s
+                                <span style="font-weight: 500;">Max:</span> {stats.response_time_summary['max']:.2f}s
                             </div>
                         </div>
                     </div>
@@ -1585,7 +3898,7 @@ def main():
                     st.altair_chart(scatter + regression, use_container_width=True)
                     
                     # Add correlation info
-                    correlation = df['message_length'].corr(df['sentiment_score'])
+                    correlation = correlation_matrix.loc['message_length', 'sentiment_score']
                     st.markdown(f"""
                     <div style="background-color: rgba(28, 131, 225, 0.1); padding: 15px; border-radius: 10px;">
                         <h4 style="margin-top: 0;">Correlation Analysis:</h4>
@@ -1610,39 +3923,31 @@ def main():
             "User Performance Comparison", 
             "Compares performance metrics across different users"
         ):
-            if not df.empty and len(df['user_id'].unique()) > 1:
-                user_metrics = df.groupby('user_id').agg({
-                    'response_time': 'mean',
-                    'sentiment_score': 'mean',
-                    'message_length': 'mean',
-                    'drop_off': lambda x: x.mean() * 100,  # Convert to percentage
-                    'conversation_id': 'count'
-                }).reset_index()
+            if not df.empty and stats.unique_users > 1:
+                user_metrics = stats.user_metrics
+                radar_scores = stats.user_radar
                 
-                user_metrics.columns = ['User ID', 'Avg Response Time', 'Avg Sentiment', 'Avg Message Length', 'Drop-off %', 'Message Count']
+                # Only a handful of users fit on the radar; start with the busiest. The
+                # selection is kept across refreshes, minus users no longer in the data
+                users = list(user_metrics['User ID'])
+                if 'compare_users' not in st.session_state:
+                    st.session_state.compare_users = list(
+                        user_metrics.nlargest(RADAR_TOP_N, 'Message Count')['User ID']
+                    )
+                st.session_state.compare_users = [
+                    user for user in st.session_state.compare_users if user in users
+                ]
+                compared = st.multiselect(
+                    "Compare users",
+                    users,
+                    key='compare_users',
+                    help=f"Starts with the {RADAR_TOP_N} users with the most messages"
+                )
                 
                 # Create radar chart data
-                radar_data = []
-                for user in user_metrics['User ID']:
-                    user_data = user_metrics[user_metrics['User ID'] == user]
-                    
-                    # Normalize values for radar chart
-                    response_time_norm = 1 - (user_data['Avg Response Time'].values[0] / user_metrics['Avg Response Time'].max())
-                    sentiment_norm = (user_data['Avg Sentiment'].values[0] + 1) / 2  # Convert from [-1,1] to [0,1]
-                    length_norm = user_data['Avg Message Length'].values[0] / user_metrics['Avg Message Length'].max()
-                    retention_norm = 1 - (user_data['Drop-off %'].values[0] / 100)
-                    volume_norm = user_data['Message Count'].values[0] / user_metrics['Message Count'].max()
-                    
-                    # Add to radar data
-                    radar_data.extend([
-                        {'User': user, 'Metric': 'Response Speed', 'Value': response_time_norm},
-                        {'User': user, 'Metric': 'Sentiment', 'Value': sentiment_norm},
-                        {'User': user, 'Metric': 'Message Length', 'Value': length_norm},
-                        {'User': user, 'Metric': 'Retention', 'Value': retention_norm},
-                        {'User': user, 'Metric': 'Volume', 'Value': volume_norm}
-                    ])
-                
-                radar_df = pd.DataFrame(radar_data)
+                radar_df = radar_scores.loc[compared].rename_axis('User').reset_index().melt(
+                    'User', var_name='Metric', value_name='Value'
+                )
                 
                 # Create radar chart with Altair
                 radar = alt.Chart(radar_df).mark_line(point=True).encode(
@@ -1679,10 +3984,12 @@ def main():
         with viz_tabs[0]:
             st.subheader("Sentiment Analysis Over Time")
             if not df.empty:
-                # Prepare data
-                df_time = df.copy()
-                df_time['date'] = df_time['timestamp'].dt.date
-                sentiment_time = df_time.groupby('date')['sentiment_score'].mean().reset_index()
+                # Mean sentiment per time bucket from the rollup sums
+                scored = time_series[time_series['n_sentiment_score'] > 0]
+                sentiment_time = pd.DataFrame({
+                    'date': scored['time'],
+                    'sentiment_score': scored['sum_sentiment_score'] / scored['n_sentiment_score'],
+                })
                 
                 # Create line chart with Altair
                 line = alt.Chart(sentiment_time).mark_line(point=True).encode(
@@ -1696,8 +4003,8 @@ def main():
                 
                 st.altair_chart(line, use_container_width=True)
                 
-                st.caption("""
-                This visualization shows the average sentiment score over time.
+                st.caption(f"""
+                This visualization shows the average sentiment score per {resolution} over time.
                 Positive values indicate positive sentiment, while negative values indicate negative sentiment.
                 """)
             else:
@@ -1705,7 +4012,7 @@ def main():
         
         with viz_tabs[1]:
             st.subheader("User-Topic Network Graph")
-            edge_data, node_data = create_conversation_network(df)
+            edge_data, node_data, layout_seconds = create_conversation_network(df, filters)
             if edge_data and node_data:
                 # Create network visualization with Altair
                 nodes_df = pd.DataFrame(node_data)
@@ -1717,10 +4024,26 @@ def main():
                     on='mouseover', fields=['name'], nearest=True
                 )
                 
+                # Draw edges between the layout positions of their nodes
+                edges_df = edges_df.assign(
+                    x=nodes_df['x'].to_numpy()[edges_df['source']],
+                    y=nodes_df['y'].to_numpy()[edges_df['source']],
+                    x2=nodes_df['x'].to_numpy()[edges_df['target']],
+                    y2=nodes_df['y'].to_numpy()[edges_df['target']]
+                )
+                edge_chart = alt.Chart(edges_df).mark_rule(color='#9ca3af').encode(
+                    x=alt.X('x:Q', axis=None),
+                    y=alt.Y('y:Q', axis=None),
+                    x2='x2:Q',
+                    y2='y2:Q',
+                    strokeWidth=alt.StrokeWidth('weight:Q', legend=None, scale=alt.Scale(range=[0.5, 4])),
+                    opacity=alt.value(0.4)
+                )
+                
                 # Create the nodes visualization
                 node_chart = alt.Chart(nodes_df).mark_circle(size=300).encode(
-                    x=alt.X('index:O', axis=None),
-                    y=alt.Y('type:N'),
+                    x=alt.X('x:Q', axis=None),
+                    y=alt.Y('y:Q', axis=None),
                     color=alt.Color('type:N', scale=alt.Scale(
                         domain=['user', 'topic'],
                         range=['#4b6cb7', '#ff7f0e']
@@ -1731,14 +4054,14 @@ def main():
                 
                 # Create text labels for nodes
                 text_chart = alt.Chart(nodes_df).mark_text(dy=-15).encode(
-                    x=alt.X('index:O', axis=None),
-                    y=alt.Y('type:N'),
+                    x=alt.X('x:Q', axis=None),
+                    y=alt.Y('y:Q', axis=None),
                     text='name:N',
                     opacity=alt.condition(highlight, alt.value(1), alt.value(0.7))
                 )
                 
                 # Combine the visualizations
-                network_chart = (node_chart + text_chart).properties(
+                network_chart = (edge_chart + node_chart + text_chart).properties(
                     height=400
                 ).interactive()
                 
@@ -1763,6 +4086,7 @@ def main():
                 Hover over nodes to highlight connections. The visualization helps identify which users 
                 are discussing which topics most frequently.
                 """)
+                st.caption(f"Layout of {len(node_data)} nodes and {len(edge_data)} edges took {layout_seconds:.2f}s")
             else:
                 st.info("Not enough data for network visualization")
         
@@ -1770,11 +4094,8 @@ def main():
             st.subheader("Advanced Metrics Visualization")
             
             if not df.empty:
-                # Create a scatter plot matrix for multiple metrics
-                metrics_df = df[['sentiment_score', 'response_time', 'message_length']].copy()
-                
                 # Create correlation heatmap
-                corr = metrics_df.corr().reset_index().melt('index')
+                corr = correlation_matrix.reset_index().melt('index')
                 corr.columns = ['Variable 1', 'Variable 2', 'Correlation']
                 
                 corr_chart = alt.Chart(corr).mark_rect().encode(
@@ -1846,53 +4167,50 @@ def main():
     # Tab 4: User Journeys
     with tabs[3]:
         st.subheader("User Journey Flow")
-        sankey_data, labels = create_user_journey_sankey(df) if not df.empty else (None, None)
+        stages = st.multiselect(
+            "Journey stages",
+            list(JOURNEY_STAGES),
+            default=JOURNEY_DEFAULT_STAGES,
+            format_func=JOURNEY_STAGES.get,
+            help="Columns a journey passes through, in order"
+        )
+        sankey_data, labels = None, None
+        if not df.empty:
+            if all(col in CUBE_DIMENSIONS for col in stages):
+                # Stages the rollup cube breaks down by are counted from its cells
+                sankey_data, labels = create_user_journey_sankey(rollup(stages), stages, weight='count')
+            else:
+                sankey_data, labels = create_user_journey_sankey(df, stages)
         if sankey_data is not None:
-            # Since Altair doesn't have a built-in Sankey diagram, we'll use matplotlib to create one
-            # and display it as an image
-            
             # Display a simplified version of the data
-            st.markdown("### User → Intent → Sentiment Flow")
-            
-            # Create a grouped bar chart to show the flow
-            user_intent = sankey_data[sankey_data['source_label'].isin(df['user_id'].unique())]
-            
-            # Create a chart showing user to intent flow
-            user_intent_chart = alt.Chart(user_intent).mark_bar().encode(
-                x=alt.X('source_label:N', title='User'),
-                y=alt.Y('value:Q', title='Count'),
-                color=alt.Color('target_label:N', title='Intent'),
-                tooltip=['source_label:N', 'target_label:N', 'value:Q']
-            ).properties(
-                title='User to Intent Flow',
-                height=300
-            ).interactive()
-            
-            # Create a chart showing intent to sentiment flow
-            intent_sentiment = sankey_data[sankey_data['source_label'].isin(df['intent'].unique())]
-            
-            intent_sentiment_chart = alt.Chart(intent_sentiment).mark_bar().encode(
-                x=alt.X('source_label:N', title='Intent'),
-                y=alt.Y('value:Q', title='Count'),
-                color=alt.Color('target_label:N', title='Sentiment', 
-                               scale=alt.Scale(
-                                   domain=['positive', 'neutral', 'negative'],
-                                   range=['#4CAF50', '#FFC107', '#F44336']
-                               )),
-                tooltip=['source_label:N', 'target_label:N', 'value:Q']
-            ).properties(
-                title='Intent to Sentiment Flow',
-                height=300
-            ).interactive()
+            st.markdown(f"### {' → '.join(JOURNEY_STAGES[col] for col in stages)} Flow")
             
-            # Display the charts
-            st.altair_chart(user_intent_chart, use_container_width=True)
-            st.altair_chart(intent_sentiment_chart, use_container_width=True)
+            # Create a grouped bar chart per pair of adjacent stages
+            for source_stage, target_stage in zip(stages, stages[1:]):
+                flow = sankey_data[sankey_data['source_stage'] == source_stage]
+                color_scale = alt.Undefined
+                if target_stage == 'sentiment_label':
+                    color_scale = alt.Scale(
+                        domain=['positive', 'neutral', 'negative'],
+                        range=['#4CAF50', '#FFC107', '#F44336']
+                    )
+                
+                flow_chart = alt.Chart(flow).mark_bar().encode(
+                    x=alt.X('source_label:N', title=JOURNEY_STAGES[source_stage]),
+                    y=alt.Y('value:Q', title='Count'),
+                    color=alt.Color('target_label:N', title=JOURNEY_STAGES[target_stage], scale=color_scale),
+                    tooltip=['source_label:N', 'target_label:N', 'value:Q']
+                ).properties(
+                    title=f'{JOURNEY_STAGES[source_stage]} to {JOURNEY_STAGES[target_stage]} Flow',
+                    height=300
+                ).interactive()
+                
+                st.altair_chart(flow_chart, use_container_width=True)
             
-            st.caption("""
-            These charts show the flow of users through different intents and sentiment outcomes.
-            The top chart shows which intents each user engages with, while the bottom chart shows 
-            how each intent leads to different sentiment outcomes.
+            st.caption(f"""
+            These charts show the flow of conversations through each stage in turn.
+            Each chart shows how the values of one stage lead to the values of the next. Only the
+            {JOURNEY_TOP_N} most common values of a stage are shown; the rest are grouped as "{JOURNEY_OTHER}".
             """)
         else:
             st.info("Not enough data for user journey visualization")
@@ -2063,15 +4381,25 @@ def main():
     with tabs[4]:
         st.subheader("Chat Data Explorer")
         
+        # Avatars and topic images are left out of the shared projection; once
+        # asked for, they are fetched by id for just the rows shown
+        if not demo and CHAT_LOGS_ID_COLUMN and not st.session_state.explorer_details:
+            if st.button("Load Avatars and Images"):
+                st.session_state.explorer_details = True
+                st.experimental_rerun()
+        explorer_df = store.read(ChatLogStore.select, filters[1])
+        
         # Add search and filter options
-        col1, col2, col3 = st.columns([2, 1, 1])
+        col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
         
         with col1:
             search_term = st.text_input(
                 "Search in messages", 
                 placeholder="Enter search term...",
-                help="Search in user messages and chatbot replies"
+                help="Search in user messages and chatbot replies. All words must appear; "
+                     "end a word with * to match words starting with it"
             )
+            literal_search = st.checkbox("Match exact phrase", help="Match the search text as typed, including spaces and symbols")
         
         with col2:
             sentiment_filter = st.selectbox(
@@ -2081,21 +4409,29 @@ def main():
             )
         
         with col3:
-            if 'topic' in df.columns:
+            if 'topic' in explorer_df.columns:
                 topic_filter = st.selectbox(
                     "Filter by topic",
-                    ["All"] + sorted(df['topic'].unique().tolist()),
+                    ["All"] + sorted(explorer_df['topic'].unique().tolist()),
                     index=0
                 )
         
+        with col4:
+            if 'tags' in explorer_df.columns:
+                counts = tag_counts(explorer_df['tags'])
+                tag_filter = st.multiselect(
+                    "Filter by tags",
+                    TAG_VOCABULARY,
+                    format_func=lambda tag: f"{tag} ({counts[tag]})"
+                )
+        
         # Apply filters
-        filtered_df = df.copy()
+        filtered_df = explorer_df.copy()
         
         if search_term:
-            filtered_df = filtered_df[
-                filtered_df['user_message'].str.contains(search_term, case=False) | 
-                filtered_df['chatbot_reply'].str.contains(search_term, case=False)
-            ]
+            # Matching row positions come from the search index, which are also the frame's labels
+            matches = store.read(ChatLogStore.search, filters[1], search_term, literal_search)
+            filtered_df = filtered_df[filtered_df.index.isin(matches)]
         
         if sentiment_filter != "All":
             filtered_df = filtered_df[filtered_df['sentiment_label'].str.lower() == sentiment_filter.lower()]
@@ -2103,6 +4439,19 @@ def main():
         if 'topic_filter' in locals() and topic_filter != "All":
             filtered_df = filtered_df[filtered_df['topic'] == topic_filter]
         
+        if 'tag_filter' in locals() and tag_filter:
+            # Rows carrying any of the selected tags
+            filtered_df = filtered_df[(filtered_df['tags'] & tag_mask(tag_filter)) != 0]
+        
+        if st.session_state.explorer_details and not demo and not filtered_df.empty:
+            details = fetch_chat_log_details(tuple(filtered_df[CHAT_LOGS_ID_COLUMN].tolist()))
+            if not details.empty:
+                filtered_df = filtered_df.join(details.set_index(CHAT_LOGS_ID_COLUMN), on=CHAT_LOGS_ID_COLUMN)
+        
+        # Tags are kept as bitmasks; the grid and exports show them as text
+        if 'tags' in filtered_df.columns:
+            filtered_df = filtered_df.assign(tags=decode_tags(filtered_df['tags']))
+        
         # Create Airtable-like grid
         st.markdown("### Chat Logs")
         
@@ -2203,22 +4552,33 @@ def main():
                     mime="application/vnd.ms-excel"
                 )
 
-    # -----------------------------
-    # FOOTER
-    # -----------------------------
-    st.markdown("""
-    <div style="background-color: rgba(28, 131, 225, 0.1); padding: 15px; border-radius: 5px; margin-top: 20px; text-align: center;">
-        <p style="margin: 0; color: #666;">
-            <b>Premium Chat Analytics Dashboard</b> | Auto-refreshes every {st.session_state.refresh_interval} seconds | 
-            Data timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+    render_footer()
     
-    # Close dark mode div if enabled
-    if st.session_state.dark_mode:
-        st.markdown('</div>', unsafe_allow_html=True)
+    if feed is not None:
+        watch_for_new_chats(feed, filters, feed_seq)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Chat analytics dashboard tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate-dataset", help="Write a synthetic chat log dataset to Parquet")
+    generate.add_argument("path", help="Output directory, which must not already hold data")
+    generate.add_argument("--rows", type=int, default=DATASET_CHUNK_SIZE)
+    generate.add_argument("--chunk-size", type=int, default=DATASET_CHUNK_SIZE)
+    generate.add_argument("--conversations", type=int, help="Distinct conversations (default: rows / 15)")
+    generate.add_argument("--users", type=int, help="Distinct users (default: the five demo users)")
+    generate.add_argument("--days", type=int, default=14, help="Days of history before now")
+    generate.add_argument("--seed", type=int)
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    main()
+    # `streamlit run script.py` renders the dashboard; `python script.py generate-dataset ...` runs the tool
+    if get_script_run_ctx() is None:
+        args = parse_args(sys.argv[1:])
+        written = write_chat_log_dataset(
+            args.path, args.rows, chunk_size=args.chunk_size, seed=args.seed,
+            num_conversations=args.conversations, num_users=args.users, days=args.days
+        )
+        print(f"Wrote {written:,} chat logs to {args.path}")
+    else:
+        main()
 